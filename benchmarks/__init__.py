@@ -0,0 +1 @@
+"""Missil performance benchmarks."""
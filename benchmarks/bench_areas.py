@@ -0,0 +1,103 @@
+"""
+Measure the cost of declaring and instantiating a large AreasBase subclass.
+
+Generates a module declaring ``--areas`` areas, then imports it and
+instantiates the class the way an app does at startup. Reports wall time and
+memory allocated (via ``tracemalloc``) when no rule is used yet, when a share
+of the areas is used by routes, and when every rule of every area is built,
+which is what construction cost before rules were built lazily.
+
+```console
+$ python -m benchmarks.bench_areas --areas 2000 --repeat 5
+```
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Any
+
+import missil
+
+
+SECRET_KEY = "2ef9451be5d149ceaf5be306b5aa03b41a0331218926e12329c5eeba60ed5cf0"
+SCENARIOS = {"no_rules": 0.0, "used_10pct": 0.1, "all_rules": 1.0}
+
+
+def write_module(directory: pathlib.Path, areas: int) -> pathlib.Path:
+    """Write a module declaring ``areas`` areas, like a generated one."""
+    lines = ["import missil", "", "", "class AppAreas(missil.AreasBase):"]
+    lines += [f"    area_{i}: missil.Area" for i in range(areas)]
+    path = directory / "generated_areas.py"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def load(path: pathlib.Path, name: str) -> ModuleType:
+    """Import the generated module under a fresh name."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def startup(path: pathlib.Path, name: str, used: float) -> missil.AreasBase:
+    """Import, instantiate and touch the rules of the ``used`` share of areas."""
+    bearer = missil.TokenBearer("Authorization", SECRET_KEY, "permissions")
+    areas: missil.AreasBase = load(path, name).AppAreas(bearer)
+    names = areas.area_names()
+    for area_name in names[: int(len(names) * used)]:
+        area = getattr(areas, area_name)
+        area.READ, area.WRITE, area.ADMIN  # noqa: B018
+    return areas
+
+
+def run(path: pathlib.Path, used: float, repeat: int) -> dict[str, float]:
+    """Time the startup and measure the memory it retains."""
+    seconds: list[float] = []
+    for attempt in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        startup(path, f"generated_{used}_{attempt}", used)
+        seconds.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    areas = startup(path, f"generated_{used}_traced", used)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del areas
+
+    return {
+        "startup_ms": statistics.median(seconds) * 1000,
+        "retained_kib": retained / 1024,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main() -> None:
+    """Run every scenario and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--areas", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {"areas": args.areas, "python": sys.version.split()[0]}
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_module(pathlib.Path(directory), args.areas)
+        for scenario, used in SCENARIOS.items():
+            results[scenario] = run(path, used, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
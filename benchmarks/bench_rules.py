@@ -0,0 +1,141 @@
+"""
+Compare event-loop and threadpool evaluation of AccessRule and Role checks.
+
+Runs the ``sample/main.py`` protected routes in-process through an ASGI
+transport, once with the stock (async) rule dependencies and once with
+equivalent plain ``def`` dependencies that FastAPI sends to the threadpool.
+
+```console
+$ python -m benchmarks.bench_rules --requests 2000 --concurrency 32
+```
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import json
+import statistics
+import time
+from typing import Annotated
+from typing import Any
+
+from fastapi import Depends
+from fastapi import FastAPI
+import httpx
+
+import missil
+from missil.rules import AccessRule
+from missil.rules import Role
+
+
+SECRET_KEY = "2ef9451be5d149ceaf5be306b5aa03b41a0331218926e12329c5eeba60ed5cf0"
+ROUTES = ("/finances/read", "/finances/admin", "/analyst-dashboard")
+
+
+def _sync_rule(rule: AccessRule) -> Callable[..., Any]:
+    """Build a threadpool-bound equivalent of an AccessRule check."""
+
+    def check(
+        claims: Annotated[
+            tuple[missil.JWTClaims, dict[str, int]], Depends(rule.bearer)
+        ],
+    ) -> missil.JWTClaims:
+        if claims[1].get(rule.area, -1) < rule.level:
+            raise missil.PermissionDeniedException(403, "denied")
+        return claims[0]
+
+    return check
+
+
+def build_app(threadpool: bool) -> FastAPI:
+    """Build an app mirroring the sample routes."""
+    bearer = missil.TokenBearer("Authorization", SECRET_KEY, "userPermissions")
+
+    class AppAreas(missil.AreasBase):
+        finances: missil.Area
+        it: missil.Area
+
+    areas = AppAreas(bearer)
+    read: Any = areas.finances.READ
+    admin: Any = areas.finances.ADMIN
+    analyst: Any = Role(areas.finances.READ, areas.it.READ)
+
+    if threadpool:
+        read = Depends(_sync_rule(areas.finances.READ))
+        admin = Depends(_sync_rule(areas.finances.ADMIN))
+        analyst_rules = [_sync_rule(areas.finances.READ), _sync_rule(areas.it.READ)]
+
+        def check_analyst(
+            first: Annotated[missil.JWTClaims, Depends(analyst_rules[0])],
+            second: Annotated[missil.JWTClaims, Depends(analyst_rules[1])],
+        ) -> missil.JWTClaims:
+            return first
+
+        analyst = Depends(check_analyst)
+
+    app = FastAPI()
+
+    @app.get("/finances/read", dependencies=[read])
+    def finances_read() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    @app.get("/finances/admin", dependencies=[admin])
+    def finances_admin() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    @app.get("/analyst-dashboard", dependencies=[analyst])
+    def analyst_dashboard() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> dict[str, float]:
+    """Fire ``requests`` calls over the sample routes and collect latencies."""
+    token = missil.encode_jwt_token(
+        {"userPermissions": {"finances": missil.ADMIN, "it": missil.WRITE}},
+        SECRET_KEY,
+        1,
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def one(path: str) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await c.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(ROUTES[i % len(ROUTES)]) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": requests / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    """Run both modes and print a JSON summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    results = {
+        mode: asyncio.run(run(build_app(mode == "threadpool"), **vars(args)))
+        for mode in ("event_loop", "threadpool")
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""
+Benchmark suite for the Missil auth hot path.
+
+Times each stage of request authentication in isolation, then measures
+end-to-end throughput of ``sample/main.py`` through an in-process ASGI
+transport. Results are written as JSON so runs can be compared across
+releases:
+
+```console
+$ python -m benchmarks.suite --output before.json
+$ pip install -U missil
+$ python -m benchmarks.suite --output after.json --compare before.json
+```
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from collections.abc import Coroutine
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from datetime import timezone
+from functools import partial
+import importlib.metadata
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import rsa
+import httpx
+from starlette.requests import Request
+
+import missil
+from missil.exceptions import TokenValidationException
+
+
+SECRET_KEY = "2ef9451be5d149ceaf5be306b5aa03b41a0331218926e12329c5eeba60ed5cf0"
+PERMISSIONS = {"finances": missil.ADMIN, "it": missil.WRITE}
+SAMPLE_ROUTES = (
+    "/",
+    "/finances/read",
+    "/finances/admin",
+    "/finances/read/router",
+    "/analyst-dashboard",
+    "/user-profile",
+)
+
+Benchmark = Callable[[], object]
+Selected = Callable[[str], bool]
+"""Whether a stage name passes ``--filter``, checked before costly setup."""
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Drive a coroutine that never suspends, without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("benchmarked coroutine suspended")
+
+
+def measure(fn: Benchmark, min_time: float) -> dict[str, float]:
+    """Time ``fn`` with timeit, auto-ranging the loop count."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [elapsed / number for elapsed in timer.repeat(repeat=5, number=number)]
+    return {
+        "ops_per_second": 1 / min(runs),
+        "best_us": min(runs) * 1e6,
+        "median_us": statistics.median(runs) * 1e6,
+        "loops": number,
+    }
+
+
+def make_request(headers: dict[str, str] | None = None) -> Callable[[], Request]:
+    """
+    Return a factory of bare Starlette requests carrying the given headers.
+
+    Requests memoize parsed headers and cookies, so every timed call needs a
+    fresh one to measure extraction rather than a dict lookup.
+    """
+    raw_headers = [
+        (key.lower().encode("latin-1"), value.encode("latin-1"))
+        for key, value in (headers or {}).items()
+    ]
+    scope = {"type": "http", "headers": raw_headers}
+    return lambda: Request(scope)
+
+
+def codec_benchmarks(selected: Selected) -> dict[str, Benchmark]:
+    """Encode and decode tokens for each supported algorithm family."""
+    key_factories: dict[str, Callable[[], Any]] = {
+        "HS256": lambda: SECRET_KEY,
+        "RS256": lambda: rsa.generate_private_key(65537, 2048),
+        "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate,
+    }
+    claims = {"username": "JohnDoe", "permissions": PERMISSIONS}
+    benchmarks: dict[str, Benchmark] = {}
+
+    for algorithm, make_key in key_factories.items():
+        names = (f"encode_jwt_token[{algorithm}]", f"decode_jwt_token[{algorithm}]")
+        if not any(map(selected, names)):
+            continue
+        private_key = make_key()
+        token = missil.encode_jwt_token(claims, private_key, 1, algorithm=algorithm)
+        verification_key = missil.StaticKeyManager(private_key, algorithm).key
+
+        def encode(key: Any = private_key, alg: str = algorithm) -> str:
+            return missil.encode_jwt_token(claims, key, 1, algorithm=alg)
+
+        def decode(
+            token: str = token, key: Any = verification_key, alg: str = algorithm
+        ) -> missil.JWTClaims:
+            return missil.decode_jwt_token(token, key, alg)
+
+        benchmarks[names[0]] = encode
+        benchmarks[names[1]] = decode
+
+    return benchmarks
+
+
+def _es256_pem() -> bytes:
+    """Generate an ES256 private key in PEM, as sent to worker processes."""
+    return ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def minting_benchmarks(selected: Selected, stack: ExitStack) -> dict[str, Benchmark]:
+    """Token issuance with encode_jwt_token and TokenMinter, alone and batched."""
+    key_factories: dict[str, Callable[[], Any]] = {
+        "HS256": lambda: SECRET_KEY,
+        "ES256": _es256_pem,
+    }
+    claims: Any = {"sub": "JohnDoe", "permissions": PERMISSIONS}
+    batch = [claims] * 1000
+    pool: ProcessPoolExecutor | None = None
+    if any(
+        selected(f"TokenMinter.mint_many[{alg},1000,process]") for alg in key_factories
+    ):
+        pool = stack.enter_context(ProcessPoolExecutor())
+    benchmarks: dict[str, Benchmark] = {}
+
+    for algorithm, make_key in key_factories.items():
+        names = (
+            f"encode_jwt_token[{algorithm},loaded key]",
+            f"TokenMinter.mint[{algorithm}]",
+            f"TokenMinter.mint_many[{algorithm},1000]",
+            f"TokenMinter.mint_many[{algorithm},1000,process]",
+        )
+        if not any(map(selected, names)):
+            continue
+        key = make_key()
+        minter = missil.TokenMinter(key, algorithm, jwt_id=True)
+        loaded_key = missil.load_key(key, algorithm)
+
+        def encode(key: Any = loaded_key, alg: str = algorithm) -> str:
+            return missil.encode_jwt_token(claims, key, 1, algorithm=alg)
+
+        def mint_many(minter: Any = minter, executor: Any = None) -> list[str]:
+            return list(minter.mint_many(batch, executor=executor))
+
+        benchmarks[names[0]] = encode
+        benchmarks[names[1]] = partial(minter.mint, claims)
+        benchmarks[names[2]] = mint_many
+        if pool is not None:
+            benchmarks[names[3]] = partial(mint_many, executor=pool)
+
+    return benchmarks
+
+
+def bearer_benchmarks(selected: Selected, stack: ExitStack) -> dict[str, Benchmark]:
+    """Token extraction, TokenBearer fallback and rule evaluation."""
+    token = missil.encode_jwt_token({"permissions": PERMISSIONS}, SECRET_KEY, 1)
+    bearer = missil.TokenBearer("Authorization", SECRET_KEY, "permissions")
+    cached_bearer = missil.TokenBearer(
+        "Authorization", SECRET_KEY, "permissions", cache=missil.TokenCache()
+    )
+    cookie_request = make_request(
+        {"Cookie": f'session=abc; theme=dark; Authorization="Bearer {token}"'}
+    )
+    jar = "; ".join(f"tracker_{i}={'x' * 40}" for i in range(40))
+    jar_request = make_request({"Cookie": f"{jar}; Authorization={token}"})
+    header_request = make_request({"Authorization": f"Bearer {token}"})
+    empty_request = make_request()
+
+    class AppAreas(missil.AreasBase):
+        finances: missil.Area
+        it: missil.Area
+
+    class IndexedAreas(missil.AreasBase, indexed=True):
+        finances: missil.Area
+        it: missil.Area
+
+    areas = AppAreas(bearer)
+    indexed = IndexedAreas.area_index()
+    resolved = (bearer.decode_jwt(token), PERMISSIONS)
+    vector = (resolved[0], indexed.vectorize(PERMISSIONS))
+    rule = areas.finances.WRITE.dependency
+    indexed_rule = IndexedAreas(bearer).finances.WRITE.dependency
+    role = missil.Role(areas.finances.READ, areas.it.WRITE).dependency
+
+    def missing_token() -> None:
+        try:
+            bearer.get_token_from_header(empty_request())
+        except TokenValidationException:
+            pass
+
+    benchmarks: dict[str, Benchmark] = {
+        "split_token_str": lambda: bearer.split_token_str(f"Bearer {token}"),
+        "get_token_from_cookies": lambda: bearer.get_token_from_cookies(
+            cookie_request()
+        ),
+        "get_token_from_cookies[40 cookies]": lambda: bearer.get_token_from_cookies(
+            jar_request()
+        ),
+        "get_token_from_header": lambda: bearer.get_token_from_header(header_request()),
+        "get_token_from_header[missing]": missing_token,
+        "TokenBearer[cookie]": lambda: run_coroutine(bearer(cookie_request())),
+        "TokenBearer[header_fallback]": lambda: run_coroutine(bearer(header_request())),
+        "TokenBearer[header_fallback,cached]": lambda: run_coroutine(
+            cached_bearer(header_request())
+        ),
+        "AccessRule": lambda: run_coroutine(rule(resolved)),
+        "AccessRule[indexed]": lambda: run_coroutine(indexed_rule(vector)),
+        "Role[2 rules]": lambda: run_coroutine(role(_bearer_0=resolved)),
+        "AreaIndex.vectorize": lambda: indexed.vectorize(PERMISSIONS),
+    }
+
+    name = "TokenBearer[header_fallback,shared cache]"
+    if selected(name):
+        directory = stack.enter_context(
+            tempfile.TemporaryDirectory(prefix="missil-bench-")
+        )
+        shared_cache = missil.SharedTokenCache(f"{directory}/tokens")
+        stack.callback(shared_cache.close)
+        shared_bearer = missil.TokenBearer(
+            "Authorization", SECRET_KEY, "permissions", cache=shared_cache
+        )
+        benchmarks[name] = lambda: run_coroutine(shared_bearer(header_request()))
+
+    return benchmarks
+
+
+def packed_permissions_benchmarks(selected: Selected) -> dict[str, Benchmark]:
+    """Verify tokens of users granted 200 areas, as JSON objects and packed."""
+    names = {
+        encoding: f"TokenBearer.verify[200 areas,{encoding}]"
+        for encoding in ("json", "packed")
+    }
+    if not any(map(selected, names.values())):
+        return {}
+
+    index = missil.AreaIndex(f"department_{i}.reports" for i in range(200))
+    claims: Any = {"permissions": {area: missil.WRITE for area in index.areas}}
+    bearer = missil.TokenBearer(
+        "Authorization", SECRET_KEY, "permissions", area_index=index
+    )
+    tokens = {
+        "json": missil.encode_jwt_token(claims, SECRET_KEY, 1),
+        "packed": missil.encode_jwt_token(claims, SECRET_KEY, 1, area_index=index),
+    }
+    for encoding, token in tokens.items():
+        print(f"{encoding} token: {len(token)} bytes", file=sys.stderr)
+
+    return {
+        names[encoding]: partial(bearer.verify, token)
+        for encoding, token in tokens.items()
+    }
+
+
+def revocation_benchmarks(selected: Selected, stack: ExitStack) -> dict[str, Benchmark]:
+    """Revocation lookups, to check they stay flat as the list grows."""
+    expires_at = time.time() + 3600
+    benchmarks: dict[str, Benchmark] = {}
+    directory: str | None = None
+
+    for size in (10_000, 1_000_000):
+        names = (
+            f"MappedRevocationList[{size},revoked]",
+            f"MappedRevocationList[{size},valid]",
+        )
+        if not any(map(selected, names)):
+            continue
+        if directory is None:
+            directory = stack.enter_context(
+                tempfile.TemporaryDirectory(prefix="missil-bench-")
+            )
+        path = f"{directory}/revoked-{size}.bin"
+        missil.MappedRevocationList.write(
+            path,
+            (missil.RevokedEntry("jti", str(i), expires_at) for i in range(size)),
+        )
+        revocations = missil.MappedRevocationList(path)
+
+        def lookup(claims: dict[str, str], revocations: Any = revocations) -> bool:
+            return bool(revocations.is_revoked(claims))
+
+        benchmarks[names[0]] = partial(lookup, {"jti": "1"})
+        benchmarks[names[1]] = partial(lookup, {"jti": "not-revoked"})
+
+    return benchmarks
+
+
+async def end_to_end(requests: int, concurrency: int) -> dict[str, dict[str, float]]:
+    """Drive ``sample/main.py`` routes through an in-process ASGI transport."""
+    from sample.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    results: dict[str, dict[str, float]] = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        await c.get("/set-cookies")
+        token = json.loads(c.cookies["Authorization"]).split(" ", 1)[1]
+        c.cookies.clear()
+        headers = {"Authorization": f"Bearer {token}"}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        for route in SAMPLE_ROUTES:
+            latencies: list[float] = []
+
+            async def one(
+                route: str = route, latencies: list[float] = latencies
+            ) -> None:
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await c.get(route, headers=headers)
+                    latencies.append(time.perf_counter() - start)
+                    response.raise_for_status()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(requests)))
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            results[f"e2e {route}"] = {
+                "requests_per_second": requests / elapsed,
+                "latency_p50_ms": statistics.median(latencies) * 1e3,
+                "latency_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1e3,
+            }
+
+    return results
+
+
+def metadata() -> dict[str, str]:
+    """Describe the environment the suite ran in."""
+    versions = {}
+    for package in ("missil", "fastapi", "starlette", "PyJWT", "cryptography"):
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = "unknown"
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        **versions,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Print per-benchmark throughput change against a baseline run."""
+    for section, key in (("stages", "ops_per_second"), ("e2e", "requests_per_second")):
+        for name, result in current[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+            change = result[key] / before[key] - 1
+            print(f"{name:45} {change:+8.1%}", file=sys.stderr)
+
+
+def main() -> None:
+    """Run the suite and emit JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare with")
+    parser.add_argument("--filter", default="", help="only run matching stages")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-e2e", action="store_true")
+    args = parser.parse_args()
+
+    def selected(name: str) -> bool:
+        return args.filter in name
+
+    # Progress goes to stderr, keeping stdout for the JSON results.
+    results: dict[str, Any] = {"metadata": metadata(), "stages": {}, "e2e": {}}
+    with ExitStack() as stack:
+        stages = {
+            **codec_benchmarks(selected),
+            **minting_benchmarks(selected, stack),
+            **bearer_benchmarks(selected, stack),
+            **packed_permissions_benchmarks(selected),
+            **revocation_benchmarks(selected, stack),
+        }
+        for name, fn in stages.items():
+            if selected(name):
+                results["stages"][name] = measure(fn, args.min_time)
+                best = results["stages"][name]["best_us"]
+                print(f"{name:45} {best:10.2f} us/op", file=sys.stderr)
+
+    if not args.skip_e2e:
+        results["e2e"] = asyncio.run(end_to_end(args.requests, args.concurrency))
+        for name, result in results["e2e"].items():
+            rate = result["requests_per_second"]
+            print(f"{name:45} {rate:10.0f} req/s", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,36 @@ from missil.bearers import CookieTokenBearer
 from missil.bearers import HeaderTokenBearer
 from missil.bearers import TokenBearer
 from missil.bearers import TokenSource
+from missil.cache import RejectedTokenCache
+from missil.cache import SharedTokenCache
+from missil.cache import TokenCache
 from missil.codec import decode_jwt_token
+from missil.codec import decode_jwt_tokens
 from missil.codec import encode_jwt_token
 from missil.exceptions import PermissionDeniedException
 from missil.exceptions import TokenValidationException
+from missil.exceptions import VerificationOverloadedException
+from missil.jwks import JWKSKeyManager
+from missil.keys import KeyManager
+from missil.keys import StaticKeyManager
+from missil.keys import load_key
+from missil.keys import load_key_file
+from missil.metrics import InMemoryMetrics
+from missil.metrics import MetricsSink
+from missil.metrics import render_prometheus
+from missil.middleware import AuthenticationMiddleware
+from missil.middleware import ServerTimingMiddleware
+from missil.minter import TokenMinter
+from missil.permissions import AreaIndex
+from missil.permissions import PermissionTrie
+from missil.policy import PolicyTable
+from missil.policy import RoutePolicy
+from missil.policy import compile_policy
+from missil.revocation import MappedRevocationList
+from missil.revocation import MemoryRevocationList
+from missil.revocation import RevocationList
+from missil.revocation import RevokedEntry
+from missil.routers import ProtectedRoute
 from missil.routers import ProtectedRouter
 from missil.rules import ADMIN
 from missil.rules import READ
@@ -19,25 +45,63 @@ from missil.rules import AreasBase
 from missil.rules import Role
 from missil.rules import make_area
 from missil.rules import make_areas
+from missil.rules import merge_rules
+from missil.stores import MemoryPermissionStore
+from missil.stores import PermissionResolver
+from missil.stores import PermissionStore
+from missil.stores import SQLitePermissionStore
+from missil.timing import StageTimings
 from missil.types import JWTClaims
 
 
 __all__ = [
     "PermissionDeniedException",
     "TokenValidationException",
+    "VerificationOverloadedException",
     "TokenSource",
+    "TokenCache",
+    "RejectedTokenCache",
+    "SharedTokenCache",
+    "RevocationList",
+    "MemoryRevocationList",
+    "MappedRevocationList",
+    "RevokedEntry",
+    "PermissionStore",
+    "MemoryPermissionStore",
+    "SQLitePermissionStore",
+    "PermissionResolver",
     "encode_jwt_token",
     "decode_jwt_token",
+    "decode_jwt_tokens",
+    "TokenMinter",
+    "KeyManager",
+    "StaticKeyManager",
+    "JWKSKeyManager",
+    "load_key",
+    "load_key_file",
     "CookieTokenBearer",
     "HeaderTokenBearer",
     "TokenBearer",
     "Area",
     "AreasBase",
+    "AreaIndex",
+    "PermissionTrie",
     "Role",
     "AccessRule",
     "make_area",
     "make_areas",
+    "merge_rules",
     "ProtectedRouter",
+    "ProtectedRoute",
+    "AuthenticationMiddleware",
+    "ServerTimingMiddleware",
+    "MetricsSink",
+    "InMemoryMetrics",
+    "render_prometheus",
+    "StageTimings",
+    "compile_policy",
+    "PolicyTable",
+    "RoutePolicy",
     "READ",
     "WRITE",
     "ADMIN",
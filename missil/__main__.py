@@ -0,0 +1,135 @@
+"""
+Missil command line interface.
+
+```console
+$ python -m missil verify --key "$SECRET_KEY" tokens.txt > verdicts.jsonl
+$ cat tokens.txt | python -m missil verify --key-file public.pem -a RS256
+```
+"""
+
+import argparse
+from collections import deque
+from collections.abc import Iterator
+from collections.abc import Sequence
+import json
+import sys
+from typing import TextIO
+
+from missil.codec import decode_jwt_tokens
+from missil.exceptions import TokenValidationException
+
+
+def _read_tokens(files: Sequence[TextIO], lines: deque[int]) -> Iterator[str]:
+    """
+    Yield non-blank tokens, queueing the input line number of each one.
+
+    Verdicts come back in input order, so the caller pops each line number as
+    its verdict is written and the queue only holds tokens still in flight.
+    """
+    line_number = 0
+    for f in files:
+        for line in f:
+            line_number += 1
+            token = line.strip()
+            if token[:7].lower() == "bearer ":
+                token = token[7:].lstrip()
+            if token:
+                lines.append(line_number)
+                yield token
+
+
+def verify(args: argparse.Namespace) -> int:
+    """Verify tokens and write one JSON verdict per line."""
+    key: str | bytes = args.key
+    if args.key_file:
+        with open(args.key_file, "rb") as key_file:
+            key = key_file.read()
+
+    files = [
+        sys.stdin if path == "-" else open(path, encoding="utf-8")
+        for path in args.files or ["-"]
+    ]
+    lines: deque[int] = deque()
+    rejected = 0
+    try:
+        results = decode_jwt_tokens(
+            _read_tokens(files, lines),
+            key,
+            args.algorithm or ["HS256"],
+            executor="thread" if args.threads else "process",
+            max_workers=args.workers,
+            chunksize=args.chunksize,
+        )
+        for result in results:
+            line = lines.popleft()
+            if isinstance(result, TokenValidationException):
+                rejected += 1
+                verdict = {
+                    "line": line,
+                    "valid": False,
+                    "status_code": result.status_code,
+                    "reason": result.detail,
+                }
+            else:
+                verdict = {"line": line, "valid": True, "claims": result}
+            args.output.write(json.dumps(verdict, default=str) + "\n")
+    finally:
+        for f in files:
+            if f is not sys.stdin:
+                f.close()
+
+    return 1 if rejected and args.strict else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Parse command line arguments and run the requested command."""
+    parser = argparse.ArgumentParser(prog="python -m missil")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = commands.add_parser(
+        "verify",
+        help="verify JWT tokens in bulk and write JSONL verdicts",
+        description="Verify one token per input line (an optional 'Bearer ' "
+        "prefix is stripped) and write one JSON verdict per token: its claims, "
+        "or the reason it was rejected.",
+    )
+    key_group = verify_parser.add_mutually_exclusive_group(required=True)
+    key_group.add_argument("--key", help="shared secret or PEM encoded key")
+    key_group.add_argument("--key-file", help="file holding the key")
+    verify_parser.add_argument(
+        "-a",
+        "--algorithm",
+        action="append",
+        help="accepted algorithm, repeatable (default: HS256)",
+    )
+    verify_parser.add_argument(
+        "-w", "--workers", type=int, help="worker count (default: CPU count)"
+    )
+    verify_parser.add_argument(
+        "--threads", action="store_true", help="use threads instead of processes"
+    )
+    verify_parser.add_argument("--chunksize", type=int, default=256)
+    verify_parser.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w", encoding="utf-8"),
+        default=sys.stdout,
+        help="output file (default: stdout)",
+    )
+    verify_parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="exit with status 1 if any token is rejected",
+    )
+    verify_parser.add_argument(
+        "files", nargs="*", help="token files, '-' for stdin (default: stdin)"
+    )
+    verify_parser.set_defaults(handler=verify)
+
+    args = parser.parse_args(argv)
+    result: int = args.handler(args)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
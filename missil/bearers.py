@@ -2,19 +2,64 @@
 
 from abc import ABC
 from abc import abstractmethod
+import asyncio
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import hashlib
+import threading
+import time
 from typing import Any
+from typing import ClassVar
 from typing import cast
 import warnings
 
 from fastapi import Request
 from fastapi import status
+from starlette.requests import HTTPConnection
+from starlette.requests import cookie_parser
 
 from missil._deprecated import make_deprecated_getattr
+from missil.cache import RejectedTokenCache
+from missil.cache import SharedTokenCache
+from missil.cache import TokenCache
+from missil.codec import _decode_chunk
+from missil.codec import _header_algorithm
+from missil.codec import check_token_structure
 from missil.codec import decode_jwt_token
 from missil.exceptions import TokenValidationException
+from missil.exceptions import VerificationOverloadedException
+from missil.keys import KeyLike
+from missil.keys import KeyManager
+from missil.keys import StaticKeyManager
+from missil.metrics import CACHE_LOOKUPS
+from missil.metrics import DECODE_SECONDS
+from missil.metrics import TOKEN_SOURCES
+from missil.metrics import MetricsSink
+from missil.permissions import AreaIndex
+from missil.permissions import PermissionTrie
+from missil.revocation import RevocationList
+from missil.stores import PermissionResolver
+from missil.timing import DECODE
+from missil.timing import EXTRACT
+from missil.timing import current_timings
 from missil.types import JWTClaims
 
 
+STATE_KEY = "missil"
+"""Request ``state`` key where AuthenticationMiddleware stores bearer results."""
+
+SOURCE_NAMES = {
+    "cookie": "cookies",
+    "header": "headers",
+    "query": "query parameters",
+    "websocket": "WebSocket subprotocols",
+}
+"""Token sources a bearer can probe, with their names in error messages."""
+
+
 class TokenSource(ABC):
     """
     Abstract base for JWT token extraction and decoding.
@@ -23,13 +68,28 @@ class TokenSource(ABC):
     to implement a custom token extraction strategy.
     """
 
+    default_sources: ClassVar[tuple[str, ...]] = ("cookie", "header")
+
     def __init__(
         self,
         token_key: str,
-        secret_key: str,
+        secret_key: KeyLike | KeyManager,
         permissions_key: str | None = None,
         algorithms: str | list[str] = "HS256",
         *,
+        sources: Sequence[str] | None = None,
+        cache: TokenCache | None = None,
+        rejected_cache: RejectedTokenCache | None = None,
+        max_token_length: int | None = 8192,
+        executor: Executor | None = None,
+        max_pending: int | None = None,
+        overload_status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+        metrics: MetricsSink | None = None,
+        revocations: RevocationList | None = None,
+        area_index: AreaIndex | None = None,
+        permission_resolver: PermissionResolver | None = None,
+        subject_key: str = "sub",
+        coalesce: bool = True,
         user_permissions_key: str | None = None,
     ):
         """
@@ -39,8 +99,10 @@ class TokenSource(ABC):
         ----------
         token_key : str
             Name of the header or cookie key that carries the JWT token.
-        secret_key : str
-            Secret key used to decode the signed token.
+        secret_key : KeyLike | KeyManager
+            Key used to verify the signed token: a shared secret, a PEM encoded
+            public key, a PyJWK, a loaded key object or a KeyManager. Keys are
+            parsed once here rather than on every request.
         permissions_key : str
             Key inside the decoded JWT payload that holds the permissions dict.
             Example payload:
@@ -58,6 +120,59 @@ class TokenSource(ABC):
         algorithms : str | list[str], optional
             JWT decoding algorithm(s), by default "HS256".
             See PyJWT docs for supported values.
+        sources : Sequence[str], optional
+            Where to look for the token, in order: "cookie", "header", "query"
+            (query string parameter) and "websocket" (the subprotocol listed
+            right after a ``token_key`` subprotocol). Only the first token
+            found is decoded. Defaults to the bearer class ``default_sources``.
+        cache : TokenCache, optional
+            Cache of already verified tokens. When given, repeat requests with
+            the same token skip signature verification and permission
+            extraction until the token expires. Disabled by default.
+        rejected_cache : RejectedTokenCache, optional
+            Short-lived cache of tokens that failed verification, replaying
+            the failure without repeating the signature check. Disabled by
+            default.
+        max_token_length : int, optional
+            Tokens longer than this are rejected before any decoding, by
+            default 8192 characters. None disables the limit.
+        executor : Executor, optional
+            Pool that runs signature verification off the event loop, by
+            default None (verify inline). Worth it for asymmetric algorithms
+            (RS256, ES256...), whose CPU cost otherwise stalls every other
+            in-flight request. Thread pools accept any key; process pools need
+            ``secret_key`` as str or bytes, so it can be sent to the workers.
+        max_pending : int, optional
+            Maximum verifications queued or running on ``executor`` at once.
+            Past it, requests fail fast instead of queueing without bound. By
+            default None (no limit).
+        overload_status_code : int, optional
+            Status of the error raised when ``max_pending`` is reached, by
+            default 503.
+        metrics : MetricsSink, optional
+            Sink receiving decode latencies, token sources and cache lookups.
+            Also the default sink of rules and roles built on this bearer.
+            Disabled by default.
+        revocations : RevocationList, optional
+            Revoked token ids and subjects, checked after decoding and on
+            every token cache hit. See :meth:`is_revoked`.
+        area_index : AreaIndex, optional
+            Area ordering of permissions packed by :meth:`AreaIndex.pack`,
+            which are expanded back into a dict. Tokens with packed
+            permissions are rejected without it.
+        permission_resolver : PermissionResolver, optional
+            Load permissions from a store by the token subject instead of
+            reading them from the token, which then needs no
+            ``permissions_key``. Only supported through :meth:`authenticate`
+            and the FastAPI dependency, not the synchronous :meth:`verify`.
+        subject_key : str, optional
+            Claim identifying the user for ``permission_resolver``, by default
+            "sub".
+        coalesce : bool, optional
+            Share one verification between concurrent requests carrying the
+            same token, e.g. the parallel API calls of a page load, by default
+            True. Only applies with an ``executor``: inline verifications run
+            one at a time on the event loop and never overlap.
         user_permissions_key : str, optional
             Deprecated. Use ``permissions_key`` instead.
         """
@@ -70,29 +185,94 @@ class TokenSource(ABC):
             )
             permissions_key = permissions_key or user_permissions_key
 
-        if not permissions_key:
+        if not permissions_key and permission_resolver is None:
             raise ValueError(
                 "permissions_key is required. "
                 "Pass the JWT claim key that holds the permissions dict, "
                 "e.g. TokenSource(..., permissions_key='permissions')."
             )
+        self.sources: tuple[str, ...] = tuple(
+            self.default_sources if sources is None else sources
+        )
+        unknown = set(self.sources) - set(SOURCE_NAMES)
+        if not self.sources or unknown:
+            raise ValueError(
+                f"Invalid token sources {sorted(unknown)}. "
+                f"Pick one or more of {list(SOURCE_NAMES)}."
+            )
+
         self.token_key = token_key
+        self._header_name = token_key.lower().encode("latin-1")
+        self._probes = [
+            (source, getattr(self, f"_probe_{source}")) for source in self.sources
+        ]
+        self._not_found = (
+            f"Token not found on request "
+            f"{' or '.join(SOURCE_NAMES[source] for source in self.sources)} "
+            f"using key '{token_key}'"
+        )
         self.token_secret_key = secret_key
         self.algorithms: list[str] = (
             [algorithms] if isinstance(algorithms, str) else list(algorithms)
         )
+        self.key_manager: KeyManager = (
+            secret_key
+            if isinstance(secret_key, KeyManager)
+            else StaticKeyManager(secret_key, self.algorithms[0])
+        )
+        if isinstance(executor, ProcessPoolExecutor) and not isinstance(
+            secret_key, (str, bytes)
+        ):
+            raise ValueError(
+                "Process pool executors need secret_key as str or bytes. Loaded "
+                "keys and key managers cannot be sent to worker processes."
+            )
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be a positive integer.")
+
         self.permissions_key = permissions_key
+        if cache is not None:
+            cache.bind(self._verifier_fingerprint())
+        self.cache = cache
+        self._cache_label = "shared" if isinstance(cache, SharedTokenCache) else "token"
+        if rejected_cache is not None:
+            rejected_cache.bind(self._verifier_fingerprint())
+        self.rejected_cache = rejected_cache
+        self.max_token_length = max_token_length
+        self.executor = executor
+        self.max_pending = max_pending
+        self.overload_status_code = overload_status_code
+        self.metrics = metrics
+        self.revocations = revocations
+        self.area_index = area_index
+        self.permission_resolver = permission_resolver
+        self.subject_key = subject_key
+        self.coalesce = coalesce
+        self._in_flight: dict[str, asyncio.Task[tuple[JWTClaims, dict[str, int]]]] = {}
+        self._admission = (
+            threading.BoundedSemaphore(max_pending) if max_pending is not None else None
+        )
+
+    def _verifier_fingerprint(self) -> bytes:
+        """Digest of the keys, algorithms and claims shaping verified tokens."""
+        parts = (
+            self.key_manager.fingerprint(),
+            ",".join(self.algorithms).encode(),
+            (self.permissions_key or "").encode(),
+        )
+        return hashlib.blake2b(b"\0".join(parts), digest_size=32).digest()
 
     def split_token_str(self, token: str, sep: str = " ") -> str:
-        """Get only the token value from the source."""
-        if "bearer" in token.lower():
-            token = token.split(sep, 1)[-1]
+        """Get only the token value from the source, without a Bearer scheme."""
+        scheme = len("bearer") + len(sep)
+        if token[:scheme].lower() == "bearer" + sep:
+            return token[scheme:].lstrip(sep)
 
         return token
 
     def get_token_from_cookies(self, request: Request) -> str:
         """Read the token value from http cookies."""
-        token = request.cookies.get(self.token_key)
+        token = self._probe_cookie(request)
 
         if not token:
             raise TokenValidationException(
@@ -104,7 +284,7 @@ class TokenSource(ABC):
 
     def get_token_from_header(self, request: Request) -> str:
         """Get the token value from request headers."""
-        token = request.headers.get(self.token_key)
+        token = self._probe_header(request)
 
         if not token:
             raise TokenValidationException(
@@ -114,12 +294,167 @@ class TokenSource(ABC):
 
         return self.split_token_str(token)
 
+    def find_token(self, connection: HTTPConnection) -> tuple[str, str] | None:
+        """
+        Probe the bearer sources in order, without raising.
+
+        Parameters
+        ----------
+        connection : HTTPConnection
+            Incoming request or WebSocket.
+
+        Returns
+        -------
+        tuple[str, str] | None
+            Name of the source the token was found in and the raw token,
+            without the authentication scheme; None when no source has one.
+        """
+        for source, probe in self._probes:
+            token = probe(connection)
+            if token:
+                return source, self.split_token_str(token)
+        return None
+
+    def _probe_cookie(self, connection: HTTPConnection) -> str | None:
+        """
+        Return the token cookie, if any.
+
+        Scans the raw ``Cookie`` header for the one cookie needed instead of
+        parsing the whole cookie jar into a dict, as ``request.cookies`` does.
+        """
+        for key, value in connection.scope["headers"]:
+            if key == b"cookie":
+                return _find_cookie(value.decode("latin-1"), self.token_key)
+        return None
+
+    def _probe_header(self, connection: HTTPConnection) -> str | None:
+        """Return the token header, if any, read straight from the ASGI scope."""
+        name = self._header_name
+        for key, value in connection.scope["headers"]:
+            if key == name:
+                return str(value.decode("latin-1"))
+        return None
+
+    def _probe_query(self, connection: HTTPConnection) -> str | None:
+        """Return the token query string parameter, if any."""
+        return connection.query_params.get(self.token_key)
+
+    def _probe_websocket(self, connection: HTTPConnection) -> str | None:
+        """
+        Return the WebSocket subprotocol following a ``token_key`` subprotocol.
+
+        Browsers cannot set headers on WebSocket handshakes, so clients pass
+        the token as ``new WebSocket(url, ["Authorization", token])``.
+        """
+        if connection.scope["type"] != "websocket":
+            return None
+        protocols = connection.scope.get("subprotocols") or []
+        for marker, token in zip(protocols, protocols[1:], strict=False):
+            if marker == self.token_key:
+                return str(token)
+        return None
+
+    async def resolve(
+        self, connection: HTTPConnection
+    ) -> tuple[JWTClaims, dict[str, int]]:
+        """
+        Authenticate a connection with the first token found in ``sources``.
+
+        Reuses the result of :class:`missil.AuthenticationMiddleware` when it
+        already ran for this bearer.
+
+        Parameters
+        ----------
+        connection : HTTPConnection
+            Incoming request or WebSocket.
+
+        Returns
+        -------
+        tuple[JWTClaims, dict[str, int]]
+            Full JWT claims and the user permissions.
+
+        Raises
+        ------
+        TokenValidationException
+            No source holds a token, or the token found is invalid.
+        """
+        authenticated = self.get_authenticated(connection)
+        if authenticated is not None:
+            return authenticated
+
+        timings = current_timings.get()
+        if timings is None:
+            found = self.find_token(connection)
+        else:
+            started = time.perf_counter()
+            found = self.find_token(connection)
+            timings.add(EXTRACT, time.perf_counter() - started)
+
+        if found is None:
+            raise TokenValidationException(status.HTTP_403_FORBIDDEN, self._not_found)
+
+        result = await self.authenticate(found[1])
+        self.record_source(found[0])
+        return result
+
     def decode_jwt(self, token: str) -> JWTClaims:
         """Decode a retrieved token value and return the full JWT claims."""
         return decode_jwt_token(
-            token, self.token_secret_key, algorithms=self.algorithms
+            token, self.key_manager.get_key(token), algorithms=self.algorithms
         )
 
+    async def decode_jwt_offloaded(self, token: str) -> JWTClaims:
+        """
+        Decode a token on the bearer executor, without blocking the event loop.
+
+        Decodes inline when no executor is configured.
+
+        Raises
+        ------
+        TokenValidationException
+            The token is invalid.
+        VerificationOverloadedException
+            ``max_pending`` verifications are already in flight, raised with
+            ``overload_status_code``.
+        """
+        if self.executor is None:
+            return self.decode_jwt(token)
+
+        admission = self._admission
+        if admission is not None and not admission.acquire(blocking=False):
+            raise VerificationOverloadedException(
+                self.overload_status_code,
+                "Token verification is over capacity, retry later.",
+                headers={"Retry-After": "1"},
+            )
+
+        future: Future[Any]
+        try:
+            if isinstance(self.executor, ProcessPoolExecutor):
+                future = self.executor.submit(
+                    _decode_chunk, [token], self.token_secret_key, self.algorithms
+                )
+            else:
+                future = self.executor.submit(self.decode_jwt, token)
+        except BaseException:
+            if admission is not None:
+                admission.release()
+            raise
+
+        if admission is not None:
+            # Released when the work completes rather than when the awaiting
+            # request goes away, so abandoned verifications still count.
+            future.add_done_callback(lambda _: admission.release())
+
+        result = await asyncio.wrap_future(future)
+        if not isinstance(self.executor, ProcessPoolExecutor):
+            return cast(JWTClaims, result)
+
+        status_code, claims = result[0]
+        if status_code:
+            raise TokenValidationException(status_code, claims)
+        return cast(JWTClaims, claims)
+
     def decode_from_cookies(self, request: Request) -> JWTClaims:
         """Get token from cookies and decode it."""
         token = self.get_token_from_cookies(request)
@@ -131,54 +466,422 @@ class TokenSource(ABC):
         return self.decode_jwt(token)
 
     def get_user_permissions(self, decoded_token: JWTClaims) -> dict[str, int]:
-        """Get user permissions from a decoded token."""
+        """
+        Get user permissions from a decoded token.
+
+        Packed permissions are expanded with :meth:`unpack_permissions`.
+        Permissions holding wildcard grants such as ``finances.*`` are compiled
+        into a :class:`missil.PermissionTrie`, the others are returned as is.
+        """
         raw: dict[str, Any] = cast(dict[str, Any], decoded_token)
-        try:
-            user_permissions: dict[str, int] = raw[self.permissions_key]
-        except KeyError as ke:
+        user_permissions: dict[str, int] | None = (
+            raw.get(self.permissions_key) if self.permissions_key else None
+        )
+        if user_permissions is None:
             raise TokenValidationException(
                 401,
-                f"User permissions not found at token key " f"'{self.permissions_key}'",
-            ) from ke
+                f"User permissions not found at token key '{self.permissions_key}'",
+            )
+        if isinstance(user_permissions, str):
+            return self.unpack_permissions(user_permissions)
+        if PermissionTrie.has_wildcards(user_permissions):
+            return PermissionTrie(user_permissions)
         return user_permissions
 
+    def unpack_permissions(self, packed: str) -> dict[str, int]:
+        """
+        Expand permissions packed by :meth:`AreaIndex.pack`.
+
+        Raises
+        ------
+        TokenValidationException
+            No ``area_index`` is configured, or the packed value does not
+            match it.
+        """
+        if self.area_index is None:
+            raise TokenValidationException(
+                status.HTTP_403_FORBIDDEN,
+                "Packed permissions need an area_index to be expanded.",
+            )
+        try:
+            return self.area_index.unpack(packed)
+        except ValueError as e:
+            raise TokenValidationException(
+                status.HTTP_403_FORBIDDEN, "The token permissions are invalid."
+            ) from e
+
+    def is_revoked(self, decoded_token: JWTClaims) -> bool:
+        """
+        Tell whether a decoded token has been revoked.
+
+        Checks the ``revocations`` list, if any. Override it to consult another
+        store; revoked tokens are rejected before any permission check.
+
+        Parameters
+        ----------
+        decoded_token : JWTClaims
+            Decoded and verified claims.
+
+        Returns
+        -------
+        bool
+            Whether the token must be rejected.
+        """
+        return self.revocations is not None and self.revocations.is_revoked(
+            decoded_token
+        )
+
+    def verify(self, token: str) -> tuple[JWTClaims, dict[str, int]]:
+        """
+        Decode a token and extract its permissions, going through the cache.
+
+        Parameters
+        ----------
+        token : str
+            Raw token string, without the authentication scheme.
+
+        Returns
+        -------
+        tuple[JWTClaims, dict[str, int]]
+            Full JWT claims and the user permissions.
+
+        Raises
+        ------
+        TypeError
+            Permissions come from a ``permission_resolver``, which is async.
+        """
+        if self.permission_resolver is not None:
+            raise TypeError(
+                "Bearers with a permission_resolver can only verify tokens "
+                "asynchronously. Use authenticate() instead."
+            )
+
+        known = self.lookup(token)
+        if known is not None:
+            return known
+
+        started = time.perf_counter()
+        try:
+            return self._accept(token, self.decode_jwt(token), started)
+        except TokenValidationException as e:
+            self._reject(token, e, started)
+            raise
+
+    async def authenticate(self, token: str) -> tuple[JWTClaims, dict[str, int]]:
+        """
+        Asynchronous :meth:`verify`, offloading decoding to the executor.
+
+        Cache hits are answered on the event loop; only misses are sent to
+        the bearer executor, when there is one. With ``coalesce``, requests
+        arriving while the same token is being verified wait for that
+        verification and share its outcome, failures included.
+
+        Parameters
+        ----------
+        token : str
+            Raw token string, without the authentication scheme.
+
+        Returns
+        -------
+        tuple[JWTClaims, dict[str, int]]
+            Full JWT claims and the user permissions.
+        """
+        known = self.lookup(token)
+        if known is None:
+            if self.coalesce and self.executor is not None:
+                known = await self._verify_coalesced(token)
+            else:
+                known = await self._verify_offloaded(token)
+
+        if self.permission_resolver is not None:
+            return known[0], await self.resolve_permissions(known[0])
+        return known
+
+    async def _verify_offloaded(self, token: str) -> tuple[JWTClaims, dict[str, int]]:
+        """Decode a token missing from the caches and extract its permissions."""
+        started = time.perf_counter()
+        try:
+            decoded_token = await self.decode_jwt_offloaded(token)
+            return self._accept(token, decoded_token, started)
+        except TokenValidationException as e:
+            self._reject(token, e, started)
+            raise
+
+    async def _verify_coalesced(self, token: str) -> tuple[JWTClaims, dict[str, int]]:
+        """Join the verification of ``token`` in flight, or start one."""
+        loop = asyncio.get_running_loop()
+        flight = self._in_flight.get(token)
+        joined = flight is not None and flight.get_loop() is loop
+        if self.metrics is not None:
+            result = "hit" if joined else "miss"
+            self.metrics.increment(
+                CACHE_LOOKUPS, (("cache", "in_flight"), ("result", result))
+            )
+
+        if flight is None or not joined:
+            flight = loop.create_task(self._verify_offloaded(token))
+            self._in_flight[token] = flight
+            flight.add_done_callback(partial(self._land, token))
+        try:
+            # Shielded so that a client hanging up does not cancel the
+            # verification other requests are waiting for.
+            return await asyncio.shield(flight)
+        except TokenValidationException as e:
+            if not joined:
+                raise
+            # Each waiter raises its own instance, as exceptions carry the
+            # traceback of wherever they were last raised.
+            headers = None if e.headers is None else dict(e.headers)
+            raise type(e)(e.status_code, e.detail, headers) from e
+
+    def _land(self, token: str, flight: "asyncio.Future[Any]") -> None:
+        """Forget a finished verification."""
+        if self._in_flight.get(token) is flight:
+            del self._in_flight[token]
+        if not flight.cancelled():
+            flight.exception()  # retrieved, as waiters may all be gone
+
+    async def resolve_permissions(self, decoded_token: JWTClaims) -> dict[str, int]:
+        """
+        Load the permissions of the token subject from ``permission_resolver``.
+
+        Raises
+        ------
+        TokenValidationException
+            The token has no subject claim.
+        """
+        subject = cast(dict[str, Any], decoded_token).get(self.subject_key)
+        if not isinstance(subject, str):
+            raise TokenValidationException(
+                401, f"Subject not found at token key '{self.subject_key}'"
+            )
+        assert self.permission_resolver is not None
+        return await self.permission_resolver.get(subject)
+
+    def lookup(self, token: str) -> tuple[JWTClaims, dict[str, int]] | None:
+        """
+        Answer a token without signature work, when possible.
+
+        Checks the token cache, then the structural pre-checks, then the
+        rejected token cache.
+
+        Returns
+        -------
+        tuple[JWTClaims, dict[str, int]] | None
+            Cached claims and permissions, or None when the token still needs
+            to be decoded.
+
+        Raises
+        ------
+        TokenValidationException
+            The token is malformed or recently failed verification.
+        """
+        metrics = self.metrics
+        if self.cache is not None:
+            entry = self.cache.get(token)
+            if metrics is not None:
+                result = "miss" if entry is None else "hit"
+                metrics.increment(
+                    CACHE_LOOKUPS, (("cache", self._cache_label), ("result", result))
+                )
+            if entry is not None:
+                if self.is_revoked(entry.claims):
+                    self.cache.invalidate(token)
+                    raise _revoked()
+                if entry.permissions is None:
+                    return entry.claims, self._permissions_of(entry.claims)
+                return entry.claims, cast(dict[str, int], entry.permissions)
+
+        check_token_structure(token, self.algorithms, self.max_token_length)
+
+        if self.rejected_cache is not None:
+            rejection = self.rejected_cache.get(token)
+            if metrics is not None:
+                result = "miss" if rejection is None else "hit"
+                metrics.increment(
+                    CACHE_LOOKUPS, (("cache", "rejected"), ("result", result))
+                )
+            if rejection is not None:
+                raise rejection
+
+        return None
+
+    def _accept(
+        self, token: str, decoded_token: JWTClaims, started: float
+    ) -> tuple[JWTClaims, dict[str, int]]:
+        """Extract permissions from freshly decoded claims and cache them."""
+        if self.is_revoked(decoded_token):
+            raise _revoked()
+        self._observe_decode(token, "valid", started)
+        user_permissions = self._permissions_of(decoded_token)
+        if self.cache is not None:
+            self.cache.put(token, decoded_token, user_permissions)
+        return decoded_token, user_permissions
+
+    def _permissions_of(self, decoded_token: JWTClaims) -> dict[str, int]:
+        """Extract token permissions, unless they come from a resolver."""
+        if self.permission_resolver is not None:
+            # Looked up on every request instead, so that store changes apply
+            # to already cached tokens.
+            return {}
+        return self.get_user_permissions(decoded_token)
+
+    def _reject(
+        self, token: str, error: TokenValidationException, started: float
+    ) -> None:
+        """Remember a verification failure, unless it was due to overload."""
+        if isinstance(error, VerificationOverloadedException):
+            return
+        self._observe_decode(token, "rejected", started)
+        if self.rejected_cache is not None:
+            self.rejected_cache.put(token, error)
+
+    def _observe_decode(self, token: str, outcome: str, started: float) -> None:
+        """Record a decode latency in the request timings and metrics sink."""
+        elapsed = time.perf_counter() - started
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(DECODE, elapsed)
+        if self.metrics is not None:
+            algorithm = _header_algorithm(token[: token.index(".")]) or "unknown"
+            self.metrics.observe(
+                DECODE_SECONDS,
+                (("algorithm", algorithm), ("outcome", outcome)),
+                elapsed,
+            )
+
+    def record_source(self, source: str) -> None:
+        """Count a request authenticated with a token found in ``source``."""
+        if self.metrics is not None:
+            self.metrics.increment(
+                TOKEN_SOURCES, (("bearer", self.token_key), ("source", source))
+            )
+
+    def get_authenticated(
+        self, request: HTTPConnection
+    ) -> tuple[JWTClaims, dict[str, int]] | None:
+        """
+        Return the result already computed for this bearer by the middleware.
+
+        Parameters
+        ----------
+        request : HTTPConnection
+            Incoming request.
+
+        Returns
+        -------
+        tuple[JWTClaims, dict[str, int]] | None
+            Claims and permissions stored in the request state by
+            :class:`missil.AuthenticationMiddleware`, or None when the
+            middleware did not run for this bearer.
+
+        Raises
+        ------
+        TokenValidationException
+            The middleware failed to authenticate the request.
+        """
+        results = request.scope.get("state", {}).get(STATE_KEY)
+        if not results or self not in results:
+            return None
+
+        result = results[self]
+        if isinstance(result, TokenValidationException):
+            raise result
+        return cast(tuple[JWTClaims, dict[str, int]], result)
+
     @abstractmethod
     async def __call__(self, request: Request) -> tuple[JWTClaims, dict[str, int]]:
         """Resolve the JWT token from a request and return claims and permissions."""
 
 
+def _find_cookie(cookies: str, name: str) -> str | None:
+    """
+    Extract one cookie from a ``Cookie`` header value.
+
+    Matches :func:`starlette.requests.cookie_parser` (surrounding whitespace
+    ignored, last duplicate wins, quoted values unquoted) without splitting
+    every other cookie of the jar.
+    """
+    value = None
+    start = 0
+    while (position := cookies.find(name, start)) >= 0:
+        start = position + 1
+        if cookies[cookies.rfind(";", 0, position) + 1 : position].strip():
+            continue  # part of another cookie name or value
+
+        end = cookies.find(";", position)
+        if end < 0:
+            end = len(cookies)
+        equals = cookies.find("=", position, end)
+        if equals < 0 or cookies[position + len(name) : equals].strip():
+            continue
+
+        value = cookies[equals + 1 : end].strip()
+        start = end
+
+    if value is not None and value[:1] == '"':
+        value = cookie_parser(f"c={value}")["c"]
+    return value
+
+
+def _revoked() -> TokenValidationException:
+    """Build the error raised for revoked tokens."""
+    return TokenValidationException(
+        status.HTTP_403_FORBIDDEN, "The token has been revoked."
+    )
+
+
 class CookieTokenBearer(TokenSource):
     """Read JWT token from http cookies."""
 
-    async def __call__(self, request: Request) -> tuple[JWTClaims, dict[str, int]]:
+    default_sources = ("cookie",)
+
+    async def __call__(
+        self, request: HTTPConnection
+    ) -> tuple[JWTClaims, dict[str, int]]:
         """FastAPI will call this method when resolving the dependency."""
-        decoded_token = self.decode_from_cookies(request)
-        user_permissions = self.get_user_permissions(decoded_token)
-        return decoded_token, user_permissions
+        return await self.resolve(request)
 
 
 class HeaderTokenBearer(TokenSource):
     """Read JWT token from the Authorization request header."""
 
-    async def __call__(self, request: Request) -> tuple[JWTClaims, dict[str, int]]:
+    default_sources = ("header",)
+
+    async def __call__(
+        self, request: HTTPConnection
+    ) -> tuple[JWTClaims, dict[str, int]]:
         """FastAPI will call this method when resolving the dependency."""
-        decoded_token = self.decode_from_header(request)
-        user_permissions = self.get_user_permissions(decoded_token)
-        return decoded_token, user_permissions
+        return await self.resolve(request)
 
 
 class TokenBearer(TokenSource):
-    """Try to read the token from cookies, falling back to the request header."""
+    """
+    Read the token from the first configured source that has one.
+
+    Cookies are checked first, then the request header. Pass ``sources`` to
+    change the order or to also accept query parameters and WebSocket
+    subprotocols:
+
+    ```python
+    bearer = missil.TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        sources=["header", "cookie", "websocket"],
+    )
+    ```
+
+    Sources are probed without raising, and only the first token found is
+    decoded: an invalid cookie is rejected rather than falling back to the
+    header.
+    """
 
-    async def __call__(self, request: Request) -> tuple[JWTClaims, dict[str, int]]:
+    async def __call__(
+        self, request: HTTPConnection
+    ) -> tuple[JWTClaims, dict[str, int]]:
         """FastAPI will call this method when resolving the dependency."""
-        try:
-            decoded_token = self.decode_from_cookies(request)
-        except TokenValidationException:
-            decoded_token = self.decode_from_header(request)
-
-        user_permissions = self.get_user_permissions(decoded_token)
-        return decoded_token, user_permissions
+        return await self.resolve(request)
 
 
 __getattr__ = make_deprecated_getattr(
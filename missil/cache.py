@@ -0,0 +1,577 @@
+"""Caching of verified and rejected JWT tokens."""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any
+from typing import NamedTuple
+
+from missil.exceptions import TokenValidationException
+from missil.types import JWTClaims
+
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+MAGIC = b"MSLTOK1\0"
+_HEADER = struct.Struct("<8sII")
+_HEADER_SIZE = 64
+_SEQUENCE = struct.Struct("<I")
+_SLOT = struct.Struct("<II16sdd")
+_PROBES = 8
+
+# fcntl locks do not exclude each other within a process, so caches opened
+# on the same file in one process also share a thread lock.
+_FILE_LOCKS: dict[str, threading.Lock] = {}
+_FILE_LOCKS_GUARD = threading.Lock()
+
+
+class CachedToken(NamedTuple):
+    """A verified token held by :class:`TokenCache`."""
+
+    claims: JWTClaims
+    permissions: Mapping[str, int] | None
+    """None when only the claims are cached, see :class:`SharedTokenCache`."""
+    not_before: float
+    expires_at: float
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified tokens, keyed by the raw token string.
+
+    Entries are only ever added after a successful signature check, so a hit
+    skips the whole PyJWT decode path. Each entry is valid within the token's
+    own ``nbf``/``exp`` window and is evicted as soon as a lookup finds it
+    outside of it. When the cache is full the least recently used entry goes.
+
+    A bearer binds the cache to the way it verifies tokens, so a cache cannot
+    be shared with a bearer using other keys, algorithms or permissions claim:
+    its entries would skip that bearer's signature check.
+
+    ```python
+    bearer = missil.TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        cache=missil.TokenCache(maxsize=10_000),
+    )
+    ```
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float | None = None) -> None:
+        """
+        Create an empty token cache.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of cached tokens, by default 4096.
+        ttl : float, optional
+            Upper bound, in seconds, on how long an entry may live regardless
+            of the token ``exp`` claim. By default entries live until the token
+            expires or are pushed out by size pressure.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._scope = b""
+        self._entries: OrderedDict[str, CachedToken] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached tokens."""
+        return len(self._entries)
+
+    def bind(self, scope: bytes) -> None:
+        """
+        Tie the cache to a bearer configuration, done by bearers on creation.
+
+        Parameters
+        ----------
+        scope : bytes
+            Fingerprint of how tokens are verified, at most 64 bytes.
+
+        Raises
+        ------
+        ValueError
+            The cache is already bound to another configuration.
+        """
+        if self._scope and self._scope != scope:
+            raise ValueError(
+                f"This {type(self).__name__} is already used by a bearer "
+                "verifying tokens differently. Use one cache per bearer "
+                "configuration."
+            )
+        self._scope = scope
+
+    def get(self, token: str) -> CachedToken | None:
+        """
+        Look up a verified token.
+
+        Parameters
+        ----------
+        token : str
+            Raw token string, without the authentication scheme.
+
+        Returns
+        -------
+        CachedToken | None
+            The cached entry, or None on a miss or if the entry fell outside
+            its validity window (in which case it is evicted).
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            if not entry.not_before <= now < entry.expires_at:
+                del self._entries[token]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry
+
+    def put(
+        self, token: str, claims: JWTClaims, permissions: Mapping[str, int]
+    ) -> None:
+        """
+        Store a verified token along with its extracted permissions.
+
+        Parameters
+        ----------
+        token : str
+            Raw token string, without the authentication scheme.
+        claims : JWTClaims
+            Decoded and verified claims.
+        permissions : Mapping[str, int]
+            Permissions extracted from the claims.
+        """
+        raw: Mapping[str, Any] = claims
+        not_before = _as_timestamp(raw.get("nbf"), float("-inf"))
+        expires_at = _as_timestamp(raw.get("exp"), float("inf"))
+        if self.ttl is not None:
+            expires_at = min(expires_at, time.time() + self.ttl)
+
+        entry = CachedToken(claims, permissions, not_before, expires_at)
+        with self._lock:
+            self._entries[token] = entry
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        """Drop a single token from the cache, if present."""
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        """Drop every cached token and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SharedTokenCache(TokenCache):
+    """
+    Verified token cache shared by every worker process of a host.
+
+    A per-process :class:`TokenCache` makes each of N workers verify a fresh
+    token on its own. This cache keeps verified claims in a memory-mapped hash
+    table instead, so one verification serves all workers:
+
+    ```python
+    cache = missil.SharedTokenCache("/dev/shm/missil-tokens", maxsize=65_536)
+    bearer = missil.TokenBearer("Authorization", SECRET_KEY, "permissions", cache=cache)
+    ```
+
+    Every worker opens the same file, created on first use. Entries live in
+    fixed-size slots keyed by a 16 byte BLAKE2b digest of the token, each
+    holding the JSON claims and their ``nbf``/``exp`` window. Writers take an
+    exclusive ``fcntl`` lock; readers take no lock and use a per-slot sequence
+    counter to discard slots caught mid-write. A token is stored in one of a
+    few neighbouring slots, replacing an expired entry first and otherwise the
+    one closest to expiry.
+
+    Only claims are shared: permissions are extracted again from the cached
+    claims on each hit, which is cheap unless they are packed or hold
+    wildcards. Claims larger than a slot are not cached.
+
+    A bearer binds the cache to the way it verifies tokens (keys, algorithms
+    and permissions claim), which keys the digests: entries written by a
+    bearer with another configuration, in this process or another one using
+    the same file, never match. Use one cache per bearer configuration.
+
+    The file holds claims that bearers trust without verification. Keep it in
+    a directory writable by the application user only. POSIX only.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        maxsize: int = 16_384,
+        ttl: float | None = None,
+        *,
+        slot_size: int = 1024,
+    ) -> None:
+        """
+        Open or create a shared token cache.
+
+        Parameters
+        ----------
+        path : str | os.PathLike[str]
+            Cache file, e.g. under ``/dev/shm``. Workers sharing the cache
+            must use the same path, ``maxsize`` and ``slot_size``.
+        maxsize : int, optional
+            Number of slots, by default 16384.
+        ttl : float, optional
+            Upper bound, in seconds, on how long an entry may live regardless
+            of the token ``exp`` claim.
+        slot_size : int, optional
+            Bytes per slot, by default 1024. Claims must fit in ``slot_size``
+            minus 40 bytes once JSON encoded.
+
+        Raises
+        ------
+        ValueError
+            The file exists with another layout.
+        """
+        if fcntl is None:  # pragma: no cover
+            raise RuntimeError("SharedTokenCache requires a POSIX system.")
+        if slot_size <= _SLOT.size:
+            raise ValueError(f"slot_size must be larger than {_SLOT.size} bytes.")
+
+        super().__init__(maxsize, ttl)
+        self.path = os.fspath(path)
+        self.slot_size = slot_size
+        with _FILE_LOCKS_GUARD:
+            self._lock = _FILE_LOCKS.setdefault(
+                os.path.realpath(self.path), threading.Lock()
+            )
+        size = _HEADER_SIZE + maxsize * slot_size
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, _HEADER.pack(MAGIC, maxsize, slot_size), 0)
+                header = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            if header != (MAGIC, maxsize, slot_size):
+                raise ValueError(
+                    f"'{self.path}' holds a different cache layout, "
+                    f"(magic, slots, slot size) = {header}."
+                )
+            self._map = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def __len__(self) -> int:
+        """Return the number of live entries, scanning the whole table."""
+        now = time.time()
+        live = 0
+        for index in range(self.maxsize):
+            _, length, _, _, expires_at = _SLOT.unpack_from(
+                self._map, self._offset(index)
+            )
+            live += length > 0 and expires_at > now
+        return live
+
+    def _digest(self, token: str) -> bytes:
+        """Return the 16 byte slot key of ``token`` under the bound scope."""
+        return hashlib.blake2b(token.encode(), digest_size=16, key=self._scope).digest()
+
+    def get(self, token: str) -> CachedToken | None:
+        """
+        Look up a verified token.
+
+        Returns
+        -------
+        CachedToken | None
+            The cached claims, with ``permissions`` set to None, or None on a
+            miss or outside the token validity window.
+        """
+        digest = self._digest(token)
+        buffer = self._map
+        for offset in self._candidates(digest):
+            sequence, length, key, not_before, expires_at = _SLOT.unpack_from(
+                buffer, offset
+            )
+            if key != digest or sequence & 1 or not length:
+                continue
+            payload = buffer[offset + _SLOT.size : offset + _SLOT.size + length]
+            if _SEQUENCE.unpack_from(buffer, offset)[0] != sequence:
+                continue  # overwritten while reading
+            if not not_before <= time.time() < expires_at:
+                break
+            self.hits += 1
+            return CachedToken(json.loads(payload), None, not_before, expires_at)
+
+        self.misses += 1
+        return None
+
+    def put(
+        self, token: str, claims: JWTClaims, permissions: Mapping[str, int]
+    ) -> None:
+        """Store the claims of a verified token; ``permissions`` are not kept."""
+        payload = json.dumps(claims, separators=(",", ":")).encode()
+        if len(payload) > self.slot_size - _SLOT.size:
+            return
+
+        raw: Mapping[str, Any] = claims
+        not_before = _as_timestamp(raw.get("nbf"), float("-inf"))
+        expires_at = _as_timestamp(raw.get("exp"), float("inf"))
+        if self.ttl is not None:
+            expires_at = min(expires_at, time.time() + self.ttl)
+
+        digest = self._digest(token)
+        with self._locked():
+            offset = self._victim(digest)
+            self._write(offset, digest, not_before, expires_at, payload)
+
+    def invalidate(self, token: str) -> None:
+        """Drop a single token from the cache, if present."""
+        digest = self._digest(token)
+        with self._locked():
+            for offset in self._candidates(digest):
+                if _SLOT.unpack_from(self._map, offset)[2] == digest:
+                    self._write(offset, bytes(16), 0.0, 0.0, b"")
+
+    def clear(self) -> None:
+        """Drop every cached token, in all workers, and reset the counters."""
+        with self._locked():
+            for index in range(self.maxsize):
+                self._write(self._offset(index), bytes(16), 0.0, 0.0, b"")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        """Unmap the cache file."""
+        self._map.close()
+        os.close(self._fd)
+
+    def _offset(self, index: int) -> int:
+        """Return the byte offset of slot ``index``."""
+        return _HEADER_SIZE + index * self.slot_size
+
+    def _candidates(self, digest: bytes) -> list[int]:
+        """Return the offsets of the slots that may hold ``digest``."""
+        start = int.from_bytes(digest[:8], "little") % self.maxsize
+        return [
+            self._offset((start + probe) % self.maxsize)
+            for probe in range(min(_PROBES, self.maxsize))
+        ]
+
+    def _victim(self, digest: bytes) -> int:
+        """Pick the slot to write ``digest`` to, evicting by expiry."""
+        now = time.time()
+        victim, soonest = 0, float("inf")
+        for offset in self._candidates(digest):
+            _, length, key, _, expires_at = _SLOT.unpack_from(self._map, offset)
+            if key == digest or not length or expires_at <= now:
+                return offset
+            if expires_at < soonest:
+                victim, soonest = offset, expires_at
+        return victim
+
+    def _write(
+        self,
+        offset: int,
+        digest: bytes,
+        not_before: float,
+        expires_at: float,
+        payload: bytes,
+    ) -> None:
+        """Overwrite a slot, with the writer lock held."""
+        buffer = self._map
+        sequence = _SEQUENCE.unpack_from(buffer, offset)[0]
+        _SLOT.pack_into(
+            buffer,
+            offset,
+            (sequence + 1) & 0xFFFFFFFF,
+            len(payload),
+            digest,
+            not_before,
+            expires_at,
+        )
+        start = offset + _SLOT.size
+        buffer[start : start + len(payload)] = payload
+        # Published last: readers seeing an even sequence get a whole slot.
+        _SEQUENCE.pack_into(buffer, offset, (sequence + 2) & 0xFFFFFFFF)
+
+    def _locked(self) -> "_FileLock":
+        """Return a context manager holding the cross-process writer lock."""
+        return _FileLock(self._fd, self._lock)
+
+
+class _FileLock:
+    """Exclusive lock over a file, for threads and processes alike."""
+
+    def __init__(self, fd: int, lock: threading.Lock) -> None:
+        self.fd = fd
+        self.lock = lock
+
+    def __enter__(self) -> None:
+        self.lock.acquire()
+        fcntl.lockf(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc: object) -> None:
+        fcntl.lockf(self.fd, fcntl.LOCK_UN)
+        self.lock.release()
+
+
+class RejectedTokenCache:
+    """
+    Short-lived memory of tokens that recently failed verification.
+
+    Clients retrying with an expired or forged token would otherwise pay for a
+    full signature check on every attempt. Failures are remembered for ``ttl``
+    seconds, keyed by a fixed-size BLAKE2b fingerprint of the token so that
+    oversized junk does not inflate memory, and replayed without any crypto.
+    Like :class:`TokenCache`, it is bound to the configuration of the bearer using
+    it and refuses a bearer verifying tokens differently:
+
+    ```python
+    bearer = missil.TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        rejected_cache=missil.RejectedTokenCache(ttl=30),
+    )
+    ```
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 30.0) -> None:
+        """
+        Create an empty rejected token cache.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of remembered failures, by default 4096. The oldest
+            is dropped first.
+        ttl : float, optional
+            Seconds a failure is remembered for, by default 30. Keep it short
+            when keys rotate (e.g. JWKS), since a token signed with a key that
+            is not published yet is rejected until its entry expires.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self._scope = b""
+        self._entries: OrderedDict[bytes, tuple[float, int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of remembered failures."""
+        return len(self._entries)
+
+    def bind(self, scope: bytes) -> None:
+        """
+        Tie the cache to a bearer configuration, see :meth:`TokenCache.bind`.
+
+        Raises
+        ------
+        ValueError
+            The cache is already bound to another configuration.
+        """
+        if self._scope and self._scope != scope:
+            raise ValueError(
+                "This RejectedTokenCache is already used by a bearer verifying "
+                "tokens differently. Use one cache per bearer configuration."
+            )
+        self._scope = scope
+
+    def fingerprint(self, token: str) -> bytes:
+        """Return the 16 byte BLAKE2b digest identifying ``token``."""
+        return hashlib.blake2b(token.encode(), digest_size=16, key=self._scope).digest()
+
+    def get(self, token: str) -> TokenValidationException | None:
+        """
+        Look up a recent failure.
+
+        Parameters
+        ----------
+        token : str
+            Raw token string, without the authentication scheme.
+
+        Returns
+        -------
+        TokenValidationException | None
+            A fresh exception carrying the original status and reason, or None
+            when the token did not fail within the last ``ttl`` seconds.
+        """
+        key = self.fingerprint(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self.hits += 1
+
+        return TokenValidationException(entry[1], entry[2])
+
+    def put(self, token: str, error: TokenValidationException) -> None:
+        """
+        Remember that ``token`` failed verification with ``error``.
+
+        Parameters
+        ----------
+        token : str
+            Raw token string, without the authentication scheme.
+        error : TokenValidationException
+            The raised exception, replayed by :meth:`get`.
+        """
+        key = self.fingerprint(token)
+        entry = (time.monotonic() + self.ttl, error.status_code, str(error.detail))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every failure and reset the hit counter."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+
+
+def _as_timestamp(value: Any, default: float) -> float:
+    """Coerce a numeric JWT time claim, falling back to ``default``."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return default
@@ -1,19 +1,40 @@
 """JWT token encoding and decoding."""
 
+import base64
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from functools import lru_cache
+from itertools import islice
+import json
+import os
 from typing import Any
+from typing import Literal
+from typing import TypeVar
 
 from fastapi import status
 import jwt as pyjwt
 
 from missil.exceptions import TokenValidationException
+from missil.keys import KeyLike
+from missil.keys import StaticKeyManager
+from missil.permissions import AreaIndex
 from missil.types import JWTClaims
 
 
+T = TypeVar("T")
+
+
 def decode_jwt_token(
-    token: str, secret_key: str, algorithms: str | list[str] = "HS256"
+    token: str, secret_key: KeyLike, algorithms: str | list[str] = "HS256"
 ) -> JWTClaims:
     """
     Decode a JWT token using PyJWT.
@@ -22,8 +43,9 @@ def decode_jwt_token(
     ----------
     token : str
         Token to be decoded.
-    secret_key : str
-        Secret key to decode the signed token.
+    secret_key : KeyLike
+        Secret or public key to verify the signed token. Pass a key loaded with
+        :func:`missil.load_key` to skip PEM parsing on every call.
     algorithms : str | list[str]
         Decoding algorithm(s). See PyJWT docs for more details.
 
@@ -56,12 +78,74 @@ def decode_jwt_token(
         ) from e
 
 
+def check_token_structure(
+    token: str, algorithms: str | list[str], max_length: int | None = None
+) -> None:
+    """
+    Reject malformed tokens before any signature work.
+
+    Runs the checks PyJWT would eventually fail on, at a fraction of the cost:
+    token size, exactly three segments and a header ``alg`` among the
+    accepted algorithms. Header parsing is memoized, since tokens from one
+    issuer share a handful of distinct headers.
+
+    Parameters
+    ----------
+    token : str
+        Raw token string, without the authentication scheme.
+    algorithms : str | list[str]
+        Accepted algorithm(s).
+    max_length : int, optional
+        Maximum token length in characters, by default unbounded.
+
+    Raises
+    ------
+    TokenValidationException
+        The token is too long, malformed, or signed with another algorithm.
+    """
+    if max_length is not None and len(token) > max_length:
+        raise TokenValidationException(
+            status.HTTP_403_FORBIDDEN, "The token is too long."
+        )
+    if token.count(".") != 2:
+        raise TokenValidationException(
+            status.HTTP_403_FORBIDDEN, "The token signature is invalid."
+        )
+
+    alg = _header_algorithm(token[: token.index(".")])
+    if alg is None:
+        raise TokenValidationException(
+            status.HTTP_403_FORBIDDEN, "The token signature is invalid."
+        )
+    if alg not in ([algorithms] if isinstance(algorithms, str) else algorithms):
+        raise TokenValidationException(
+            status.HTTP_403_FORBIDDEN, "The token is invalid."
+        )
+
+
+@lru_cache(maxsize=64)
+def _header_algorithm(segment: str) -> str | None:
+    """Return the ``alg`` of an encoded JWT header, None when unreadable."""
+    try:
+        padded = segment + "=" * (-len(segment) % 4)
+        header = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or not isinstance(header.get("alg"), str):
+        return None
+    alg: str = header["alg"]
+    return alg
+
+
 def encode_jwt_token(
     claims: JWTClaims,
-    secret: str,
-    exp: int,
+    secret: KeyLike,
+    exp: int | timedelta,
     base: datetime | None = None,
     algorithm: str = "HS256",
+    *,
+    area_index: AreaIndex | None = None,
+    permissions_key: str = "permissions",
 ) -> str:
     """
     Create a JWT token.
@@ -70,24 +154,171 @@ def encode_jwt_token(
     ----------
     claims : JWTClaims
         Token user data.
-    secret : str
-        Secret key to sign the token.
-    exp : int
-        Token expiration in hours.
+    secret : KeyLike
+        Secret or private key to sign the token. Pass a key loaded with
+        :func:`missil.load_key` to skip PEM parsing on every call.
+    exp : int | timedelta
+        Token lifetime, in hours when given as an int.
     base : datetime, optional
         Token expiration base datetime, where the final datetime is given by
         base + exp, by default datetime.now(timezone.utc)
     algorithm : str, optional
         Encode algorithm, by default "HS256"
+    area_index : AreaIndex, optional
+        When given, the permissions under ``permissions_key`` are packed
+        against it with :meth:`AreaIndex.pack`.
+    permissions_key : str, optional
+        Claim holding the permissions to pack, by default "permissions".
 
     Returns
     -------
     str
         Encoded JWT token string.
+
+    Raises
+    ------
+    ValueError
+        ``area_index`` is given but the claims have no ``permissions_key``.
+
+    See Also
+    --------
+    TokenMinter : Faster issuance of many tokens with one key.
     """
     if base is None:
         base = datetime.now(timezone.utc)
 
+    if not isinstance(exp, timedelta):
+        exp = timedelta(hours=exp)
+
     to_encode: dict[str, Any] = dict(claims)
-    to_encode.update({"exp": base + timedelta(hours=exp)})
+    to_encode.update({"exp": base + exp})
+    if area_index is not None:
+        if permissions_key not in to_encode:
+            raise ValueError(f"Claims have no '{permissions_key}' to pack.")
+        to_encode[permissions_key] = area_index.pack(to_encode[permissions_key])
     return pyjwt.encode(to_encode, key=secret, algorithm=algorithm)
+
+
+def decode_jwt_tokens(
+    tokens: Iterable[str],
+    secret_key: KeyLike,
+    algorithms: str | list[str] = "HS256",
+    *,
+    executor: Executor | Literal["process", "thread"] = "process",
+    max_workers: int | None = None,
+    chunksize: int = 256,
+) -> Iterator[JWTClaims | TokenValidationException]:
+    """
+    Decode many JWT tokens in parallel, streaming results in input order.
+
+    Tokens are consumed lazily in chunks and only a bounded number of chunks
+    is in flight at once, so arbitrarily large inputs (e.g. tokens replayed
+    from access logs) run in constant memory.
+
+    ```python
+    with open("tokens.txt") as f:
+        tokens = (line.strip() for line in f)
+        for result in missil.decode_jwt_tokens(tokens, SECRET_KEY):
+            if isinstance(result, missil.TokenValidationException):
+                print("rejected:", result.detail)
+    ```
+
+    Parameters
+    ----------
+    tokens : Iterable[str]
+        Tokens to be decoded.
+    secret_key : KeyLike
+        Secret or public key to verify the signed tokens. Process pools need a
+        picklable key, i.e. a secret or PEM string/bytes rather than a loaded
+        key object.
+    algorithms : str | list[str]
+        Decoding algorithm(s). See PyJWT docs for more details.
+    executor : Executor | Literal["process", "thread"], optional
+        Pool running the decodes: "process" (default, scales signature
+        verification with CPU cores), "thread", or an existing executor, which
+        is left running.
+    max_workers : int, optional
+        Worker count for pools created here, by default ``os.cpu_count()``.
+    chunksize : int, optional
+        Tokens sent to a worker at once, by default 256.
+
+    Yields
+    ------
+    JWTClaims | TokenValidationException
+        Decoded claims, or the exception describing why the token was
+        rejected, for each token in input order.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer.")
+
+    workers = max_workers or os.cpu_count() or 1
+    pool = _make_executor(executor, workers)
+    iterator = iter(tokens)
+    chunks = iter(lambda: list(islice(iterator, chunksize)), [])
+    try:
+        for results in _ordered_map(
+            pool, _decode_chunk, chunks, 2 * workers, secret_key, algorithms
+        ):
+            for status_code, result in results:
+                if status_code:
+                    yield TokenValidationException(status_code, result)
+                else:
+                    yield result
+    finally:
+        if pool is not executor:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _make_executor(
+    executor: Executor | Literal["process", "thread"], workers: int
+) -> Executor:
+    """Return the given executor, or create the requested kind of pool."""
+    if executor == "process":
+        return ProcessPoolExecutor(workers)
+    if executor == "thread":
+        return ThreadPoolExecutor(workers)
+    return executor
+
+
+def _ordered_map(
+    pool: Executor,
+    fn: Callable[..., T],
+    items: Iterable[Any],
+    window: int,
+    *args: Any,
+) -> Iterator[T]:
+    """Map ``fn`` over ``items`` on a pool, in order, with bounded lookahead."""
+    pending: deque[Future[T]] = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, item, *args))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _decode_chunk(
+    tokens: list[str], secret_key: KeyLike, algorithms: str | list[str]
+) -> list[tuple[int, Any]]:
+    """Decode tokens in a worker; errors travel back as (status, detail)."""
+    if isinstance(secret_key, (str, bytes)):
+        algorithm = algorithms if isinstance(algorithms, str) else algorithms[0]
+        secret_key = _load_worker_key(secret_key, algorithm)
+
+    results: list[tuple[int, Any]] = []
+    for token in tokens:
+        try:
+            results.append((0, decode_jwt_token(token, secret_key, algorithms)))
+        except TokenValidationException as e:
+            results.append((e.status_code, e.detail))
+    return results
+
+
+@lru_cache(maxsize=16)
+def _load_worker_key(secret_key: str | bytes, algorithm: str) -> Any:
+    """Parse a key once per worker, as pickled keys can only travel as PEM."""
+    return StaticKeyManager(secret_key, algorithm).key
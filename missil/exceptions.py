@@ -59,6 +59,16 @@ class TokenValidationException(HTTPException):
         super().__init__(status_code=status_code, detail=detail, headers=headers)
 
 
+class VerificationOverloadedException(TokenValidationException):
+    """
+    Raised when a bearer has too many token verifications in flight.
+
+    The token itself was not checked, so it is neither cached as rejected nor
+    counted as one. See the ``max_pending`` and ``overload_status_code``
+    bearer parameters.
+    """
+
+
 __getattr__ = make_deprecated_getattr(
     {
         "PermissionErrorException": "PermissionDeniedException",
@@ -0,0 +1,257 @@
+"""Verification keys fetched from a JSON Web Key Set (JWKS) endpoint."""
+
+import json
+import logging
+import threading
+import time
+from typing import Any
+import urllib.request
+
+from fastapi import status
+import jwt as pyjwt
+
+from missil.exceptions import TokenValidationException
+from missil.keys import KeyManager
+
+
+log = logging.getLogger(__name__)
+
+
+class JWKSKeyManager(KeyManager):
+    """
+    Key manager backed by an identity provider's JWKS document.
+
+    Keys are indexed by their ``kid`` and selected through the ``kid`` in each
+    token header. :meth:`start` loads the key set and then refreshes it in a
+    background thread, periodically and when a token names an unknown ``kid``
+    (at most once every ``min_refresh_interval`` seconds). Key lookups never
+    fetch: tokens naming a ``kid`` that is not loaded yet are rejected while
+    the background refresh runs.
+
+    ```python
+    keys = missil.JWKSKeyManager("https://idp.example.com/.well-known/jwks.json")
+    bearer = missil.TokenBearer("Authorization", keys, "permissions", "RS256")
+
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        keys.start()
+        yield
+        keys.stop()
+    ```
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        refresh_interval: float = 300.0,
+        min_refresh_interval: float = 30.0,
+        timeout: float = 5.0,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Configure the JWKS source.
+
+        Parameters
+        ----------
+        url : str
+            JWKS document URL.
+        refresh_interval : float, optional
+            Seconds between background refreshes, by default 300.
+        min_refresh_interval : float, optional
+            Minimum seconds between background refreshes triggered by
+            unknown ``kid`` values, by default 30. Bounds the load a flood of tokens
+            with made-up ``kid`` values can put on the identity provider.
+        timeout : float, optional
+            HTTP timeout in seconds, by default 5.
+        retries : int, optional
+            Extra fetch attempts after a failure, by default 2.
+        retry_backoff : float, optional
+            Base delay in seconds between attempts, doubled after each one,
+            by default 0.5.
+        headers : dict[str, str], optional
+            Extra HTTP headers sent with the JWKS request.
+        """
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.headers = headers or {}
+        self._keys: dict[str | None, Any] = {}
+        self._last_refresh = float("-inf")
+        self._last_request = float("-inf")
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def fingerprint(self) -> bytes:
+        """Identify the key set by its URL."""
+        return self.url.encode()
+
+    @property
+    def kids(self) -> list[str | None]:
+        """Key ids currently loaded."""
+        return list(self._keys)
+
+    def fetch_jwks(self) -> dict[str, Any]:
+        """
+        Download the JWKS document, retrying transient failures.
+
+        Returns
+        -------
+        dict[str, Any]
+            Parsed JWKS document.
+
+        Raises
+        ------
+        OSError
+            The document could not be fetched after all retries.
+        ValueError
+            The response is not valid JSON.
+        """
+        request = urllib.request.Request(self.url, headers=self.headers)
+        delay = self.retry_backoff
+        attempt = 0
+        while True:
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    jwks: dict[str, Any] = json.load(response)
+                    return jwks
+            except OSError:
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                delay *= 2
+
+    def refresh(self) -> None:
+        """
+        Fetch the key set and atomically replace the loaded keys.
+
+        Entries of ``keys`` that are not usable signing keys are skipped.
+
+        Raises
+        ------
+        OSError
+            The document could not be fetched.
+        ValueError
+            The document is not valid JSON or not a JWKS object.
+        """
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        jwks = self.fetch_jwks()
+        if not isinstance(jwks, dict) or not isinstance(jwks.get("keys", []), list):
+            raise ValueError("The JWKS document is not an object with a keys list.")
+
+        keys: dict[str | None, Any] = {}
+        for jwk in jwks.get("keys", []):
+            if not isinstance(jwk, dict):
+                log.warning("Skipping JWK that is not an object: %r", jwk)
+                continue
+            if jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[jwk.get("kid")] = pyjwt.PyJWK(jwk).key
+            except pyjwt.PyJWKError as e:
+                log.warning("Skipping unusable JWK %r: %s", jwk.get("kid"), e)
+
+        self._keys = keys
+        self._last_refresh = time.monotonic()
+
+    def _request_refresh(self) -> None:
+        """Wake the refresh thread, unless a refresh happened recently."""
+        now = time.monotonic()
+        last = max(self._last_refresh, self._last_request)
+        if now - last < self.min_refresh_interval:
+            return
+        # Counted from the request, so an unreachable provider is not retried
+        # by every incoming token even when refreshes keep failing.
+        self._last_request = now
+        self._wake_event.set()
+
+    def _lookup(self, kid: str | None) -> Any:
+        keys = self._keys
+        if kid in keys:
+            return keys[kid]
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        return None
+
+    def get_key(self, token: str) -> Any:
+        """
+        Return the key matching the token header ``kid``.
+
+        An unknown ``kid`` asks the background thread for a refresh and is
+        rejected right away, so requests never wait for the identity provider.
+
+        Raises
+        ------
+        TokenValidationException
+            The token header cannot be read or no key matches its ``kid``.
+        RuntimeError
+            The key set was never loaded, see :meth:`start`.
+        """
+        try:
+            kid = pyjwt.get_unverified_header(token).get("kid")
+        except pyjwt.PyJWTError as e:
+            raise TokenValidationException(
+                status.HTTP_403_FORBIDDEN, "The token signature is invalid."
+            ) from e
+
+        key = self._lookup(kid)
+        if key is None:
+            if self._last_refresh == float("-inf"):
+                raise RuntimeError(
+                    "JWKS keys are not loaded; call JWKSKeyManager.start() "
+                    "at application startup."
+                )
+            self._request_refresh()
+            raise TokenValidationException(
+                status.HTTP_403_FORBIDDEN, "The token signing key is unknown."
+            )
+
+        return key
+
+    def start(self) -> None:
+        """Load the key set and keep refreshing it in a background thread."""
+        if self._thread is not None:
+            return
+
+        self.refresh()
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="missil-jwks-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self._wake_event.wait(self.refresh_interval)
+            if self._stop_event.is_set():
+                return
+            self._wake_event.clear()
+            try:
+                self.refresh()
+            except (OSError, ValueError) as e:
+                log.warning("JWKS refresh from %s failed: %s", self.url, e)
+            except Exception:
+                # Keep refreshing: a dead thread would reject rotated keys
+                # until the process restarts.
+                log.exception("JWKS refresh from %s failed", self.url)
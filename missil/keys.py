@@ -0,0 +1,167 @@
+"""Signing and verification key loading."""
+
+from abc import ABC
+from abc import abstractmethod
+import hashlib
+import os
+from typing import Any
+
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.hazmat.primitives.serialization import PublicFormat
+import jwt as pyjwt
+
+
+KeyLike = Any
+"""
+Anything PyJWT accepts as a key.
+
+A shared secret (``str``/``bytes``), a PEM or SSH encoded key (``str``/``bytes``),
+a :class:`jwt.PyJWK` or an already loaded ``cryptography`` key object.
+"""
+
+
+def load_key(key: KeyLike, algorithm: str = "HS256") -> Any:
+    """
+    Parse a key once into the object PyJWT works with for ``algorithm``.
+
+    PEM strings handed to PyJWT are parsed again on every encode and decode
+    call. Loading them upfront into ``cryptography`` key objects removes that
+    work from the request path.
+
+    Parameters
+    ----------
+    key : KeyLike
+        Secret, PEM/SSH encoded key, PyJWK or key object.
+    algorithm : str, optional
+        JWT algorithm the key is meant for, by default "HS256".
+
+    Returns
+    -------
+    Any
+        Shared secret bytes for HMAC algorithms, a ``cryptography`` key object
+        otherwise. Already loaded key objects are returned unchanged.
+
+    Raises
+    ------
+    jwt.exceptions.InvalidKeyError
+        The key cannot be parsed for the given algorithm.
+    """
+    if isinstance(key, pyjwt.PyJWK):
+        return key.key
+
+    if isinstance(key, (str, bytes)):
+        return pyjwt.get_algorithm_by_name(algorithm).prepare_key(key)
+
+    return key
+
+
+def load_key_file(path: str | os.PathLike[str], algorithm: str) -> Any:
+    """
+    Read and parse a PEM or SSH encoded key file.
+
+    Parameters
+    ----------
+    path : str | os.PathLike[str]
+        Key file path.
+    algorithm : str
+        JWT algorithm the key is meant for, e.g. "RS256".
+
+    Returns
+    -------
+    Any
+        Loaded key object. See :func:`load_key`.
+    """
+    with open(path, "rb") as f:
+        return load_key(f.read(), algorithm)
+
+
+class KeyManager(ABC):
+    """
+    Abstract provider of token verification keys.
+
+    A TokenSource asks its key manager for the key matching each token it
+    decodes. Subclass it to select keys dynamically, e.g. by the token ``kid``.
+    """
+
+    @abstractmethod
+    def get_key(self, token: str) -> Any:
+        """Return the key that verifies ``token``."""
+
+    def fingerprint(self) -> bytes:
+        """
+        Identify the keys this manager trusts.
+
+        Bearers scope :class:`missil.SharedTokenCache` entries with it, so
+        tokens verified against other keys are never trusted. Managers of
+        different processes trusting the same keys must return the same
+        value to share entries. The default is unique to this instance, which
+        is always safe but keeps entries from being shared across processes.
+        """
+        kind = type(self)
+        return f"{kind.__module__}.{kind.__qualname__}:{id(self)}".encode()
+
+
+class StaticKeyManager(KeyManager):
+    """
+    Single key, parsed once at startup.
+
+    Private asymmetric keys are reduced to their public half, so the same PEM
+    used to sign tokens can be handed to a bearer to verify them.
+
+    ```python
+    keys = missil.StaticKeyManager.from_file("public.pem", "RS256")
+    bearer = missil.TokenBearer("Authorization", keys, "permissions", "RS256")
+    ```
+    """
+
+    def __init__(self, key: KeyLike, algorithm: str = "HS256") -> None:
+        """
+        Load the verification key.
+
+        Parameters
+        ----------
+        key : KeyLike
+            Secret, PEM/SSH encoded key, PyJWK or key object.
+        algorithm : str, optional
+            JWT algorithm the key is meant for, by default "HS256".
+        """
+        loaded = load_key(key, algorithm)
+        public_key = getattr(loaded, "public_key", None)
+        self.key: Any = public_key() if callable(public_key) else loaded
+
+    @classmethod
+    def from_file(
+        cls, path: str | os.PathLike[str], algorithm: str
+    ) -> "StaticKeyManager":
+        """
+        Load the verification key from a PEM or SSH encoded file.
+
+        Parameters
+        ----------
+        path : str | os.PathLike[str]
+            Key file path.
+        algorithm : str
+            JWT algorithm the key is meant for, e.g. "RS256".
+
+        Returns
+        -------
+        StaticKeyManager
+            Key manager holding the loaded key.
+        """
+        return cls(load_key_file(path, algorithm), algorithm)
+
+    def get_key(self, token: str) -> Any:
+        """Return the preloaded key, whatever the token."""
+        return self.key
+
+    def fingerprint(self) -> bytes:
+        """Return a digest of the secret or public key."""
+        if isinstance(self.key, bytes):
+            material = self.key
+        elif hasattr(self.key, "public_bytes"):
+            material = self.key.public_bytes(
+                Encoding.DER, PublicFormat.SubjectPublicKeyInfo
+            )
+        else:
+            return super().fingerprint()
+        return hashlib.blake2b(material, digest_size=32).digest()
@@ -0,0 +1,222 @@
+"""Pluggable metrics for token verification and access decisions."""
+
+from abc import ABC
+from abc import abstractmethod
+from bisect import bisect_left
+import threading
+
+
+Labels = tuple[tuple[str, str], ...]
+"""Metric labels as ``(name, value)`` pairs, hashable and in a fixed order."""
+
+DECODE_SECONDS = "missil_token_decode_seconds"
+TOKEN_SOURCES = "missil_token_sources_total"
+ACCESS_DECISIONS = "missil_access_decisions_total"
+CACHE_LOOKUPS = "missil_cache_lookups_total"
+
+DESCRIPTIONS = {
+    DECODE_SECONDS: "Token decode and signature verification latency.",
+    TOKEN_SOURCES: "Authenticated requests by token location.",
+    ACCESS_DECISIONS: "Access rule evaluations by area, level and decision.",
+    CACHE_LOOKUPS: "Token cache lookups by cache and result.",
+}
+
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.1,
+)
+"""Histogram bounds in seconds, from HMAC (~10us) to slow RSA and queueing."""
+
+
+class MetricsSink(ABC):
+    """
+    Receiver of the metrics recorded by bearers, rules and roles.
+
+    Implement it to forward measurements to an existing metrics client, or
+    use :class:`InMemoryMetrics`. Methods are called on the request path and
+    must be cheap and thread safe. Recorded metrics:
+
+    - ``missil_token_decode_seconds`` (histogram): ``algorithm``, ``outcome``
+      (``valid`` or ``rejected``).
+    - ``missil_token_sources_total``: ``bearer`` (token key), ``source``
+      (``cookie``, ``header``, ``query`` or ``websocket``).
+    - ``missil_access_decisions_total``: ``area``, ``level``, ``decision``
+      (``granted`` or ``denied``).
+    - ``missil_cache_lookups_total``: ``cache`` (``token``, ``shared``,
+      ``rejected`` or ``in_flight``), ``result`` (``hit`` or ``miss``).
+    """
+
+    @abstractmethod
+    def increment(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        """Add ``value`` to a counter."""
+
+    @abstractmethod
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """Record one histogram observation."""
+
+
+class Histogram:
+    """Bucket counts, sum and count of one histogram series."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        """Create an empty histogram with the given upper bounds."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class InMemoryMetrics(MetricsSink):
+    """
+    Metrics sink keeping counters and histograms in process memory.
+
+    ```python
+    metrics = missil.InMemoryMetrics()
+    bearer = missil.TokenBearer(
+        "Authorization", SECRET_KEY, "permissions", metrics=metrics
+    )
+
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def export_metrics() -> str:
+        return missil.render_prometheus(metrics)
+    ```
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        Create an empty sink.
+
+        Parameters
+        ----------
+        buckets : tuple[float, ...], optional
+            Sorted histogram upper bounds, in seconds. See
+            :data:`DEFAULT_BUCKETS`.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        """Add ``value`` to a counter."""
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """Record one histogram observation."""
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """
+        Sum a counter over every series matching the given labels.
+
+        ```python
+        metrics.counter("missil_access_decisions_total", decision="denied")
+        ```
+        """
+        wanted = labels.items()
+        with self._lock:
+            return sum(
+                value
+                for (series, series_labels), value in self.counters.items()
+                if series == name and wanted <= dict(series_labels).items()
+            )
+
+    def cache_hit_ratio(self, cache: str = "token") -> float:
+        """Fraction of lookups served by ``cache``, e.g. "token" or "shared"."""
+        hits = self.counter(CACHE_LOOKUPS, cache=cache, result="hit")
+        lookups = hits + self.counter(CACHE_LOOKUPS, cache=cache, result="miss")
+        return hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Drop every recorded series."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def render_prometheus(metrics: InMemoryMetrics) -> str:
+    """
+    Export an in-memory sink in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    metrics : InMemoryMetrics
+        Sink to export.
+
+    Returns
+    -------
+    str
+        Exposition text, served with content type
+        ``text/plain; version=0.0.4``.
+    """
+    with metrics._lock:
+        counters = sorted(metrics.counters.items())
+        histograms = sorted(
+            (key, (list(h.counts), h.sum, h.count))
+            for key, h in metrics.histograms.items()
+        )
+
+    lines: list[str] = []
+    described: set[str] = set()
+
+    def describe(name: str, kind: str) -> None:
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        describe(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+    for (name, labels), (counts, total, count) in histograms:
+        describe(name, "histogram")
+        cumulative = 0
+        for bound, bucket_count in zip(
+            (*metrics.buckets, float("inf")), counts, strict=True
+        ):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            bucket_labels = _format_labels((*labels, ("le", le)))
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:.9g}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    """Render labels as ``{a="1",b="2"}``, escaping values."""
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in labels
+    )
+    return "{" + pairs + "}"
@@ -0,0 +1,138 @@
+"""ASGI middleware for Missil authentication."""
+
+from collections.abc import Callable
+
+from starlette.requests import Request
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from missil.bearers import STATE_KEY
+from missil.bearers import TokenSource
+from missil.exceptions import TokenValidationException
+from missil.timing import TIMINGS_STATE_KEY
+from missil.timing import StageTimings
+from missil.timing import current_timings
+
+
+class AuthenticationMiddleware:
+    """
+    Pure ASGI middleware that authenticates each HTTP request once.
+
+    The token is extracted and decoded by the given bearer before routing,
+    and the outcome is stored in the request ``state``. Every AccessRule, Role
+    or ProtectedRouter depending on the same bearer then reuses that result
+    instead of running the bearer again:
+
+    ```python
+    bearer = missil.TokenBearer("Authorization", SECRET_KEY, "permissions")
+
+    app = FastAPI()
+    app.add_middleware(missil.AuthenticationMiddleware, bearer=bearer)
+    ```
+
+    The middleware never rejects a request by itself. Authentication errors
+    are stored too and raised by the first dependency that needs the bearer,
+    so unprotected routes keep working without a token and errors still go
+    through FastAPI's exception handlers.
+    """
+
+    def __init__(self, app: ASGIApp, bearer: TokenSource) -> None:
+        """
+        Wrap an ASGI application.
+
+        Parameters
+        ----------
+        app : ASGIApp
+            Wrapped application.
+        bearer : TokenSource
+            Bearer used to authenticate requests. Rules must depend on this
+            same instance to reuse its result.
+        """
+        self.app = app
+        self.bearer = bearer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Authenticate an HTTP request, then hand it to the wrapped app."""
+        if scope["type"] == "http":
+            result: object
+            try:
+                result = await self.bearer(Request(scope))
+            except TokenValidationException as e:
+                result = e
+            scope.setdefault("state", {}).setdefault(STATE_KEY, {})[self.bearer] = (
+                result
+            )
+
+        await self.app(scope, receive, send)
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware timing the authentication stages of each request.
+
+    Opt-in profiling: while it is installed, bearers, rules and roles record
+    how long token extraction, decoding and permission checks took. Timings
+    are kept in the request ``state`` and sent back in a ``Server-Timing``
+    response header, readable in browser devtools and by load balancers, or
+    handed to a callback:
+
+    ```python
+    app = FastAPI()
+    app.add_middleware(missil.AuthenticationMiddleware, bearer=bearer)
+    app.add_middleware(missil.ServerTimingMiddleware)  # outermost, added last
+    ```
+
+    Without it, stages are not timed at all.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        header: bool = True,
+        callback: Callable[[Request, StageTimings], None] | None = None,
+    ) -> None:
+        """
+        Wrap an ASGI application.
+
+        Parameters
+        ----------
+        app : ASGIApp
+            Wrapped application.
+        header : bool, optional
+            Add the ``Server-Timing`` response header, by default True.
+        callback : Callable[[Request, StageTimings], None], optional
+            Called with the request and its timings once the response is sent,
+            e.g. to log slow authentications.
+        """
+        self.app = app
+        self.header = header
+        self.callback = callback
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Collect stage timings while the wrapped app handles the request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = StageTimings()
+        scope.setdefault("state", {})[TIMINGS_STATE_KEY] = timings
+
+        async def send_with_timings(message: Message) -> None:
+            if message["type"] == "http.response.start" and timings.stages:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        reset = current_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timings if self.header else send)
+        finally:
+            current_timings.reset(reset)
+
+        if self.callback is not None:
+            self.callback(Request(scope), timings)
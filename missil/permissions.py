@@ -0,0 +1,358 @@
+"""Compiled representations of user permissions."""
+
+from array import array
+import base64
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Mapping
+import hashlib
+from typing import Annotated
+from typing import Any
+
+from fastapi import Depends as FastAPIDependsFunc
+
+from missil.types import JWTClaims
+
+
+MISSING = -128
+"""Vector value of an area the user has no permission entry for."""
+
+_LOWEST, _HIGHEST = MISSING + 1, 127
+"""Range levels are clamped to, keeping negative levels apart from MISSING."""
+
+PACKED_VERSION = "p1"
+"""Version tag leading permissions packed by :meth:`AreaIndex.pack`."""
+
+
+WILDCARD = "*"
+"""Grant segment matching every area below its prefix, e.g. ``finances.*``."""
+
+SEPARATOR = "."
+"""Separator of hierarchical area names, e.g. ``finances.payroll``."""
+
+
+class _Node:
+    """Trie node: the exact grant on an area and the grant on its descendants."""
+
+    __slots__ = ("level", "wildcard", "children")
+
+    def __init__(self) -> None:
+        self.level: int | None = None
+        self.wildcard: int | None = None
+        self.children: dict[str, _Node] = {}
+
+
+class PermissionTrie(dict[str, int]):
+    """
+    User permissions with wildcard grants over hierarchical area names.
+
+    Area names are dotted paths such as ``finances.payroll.eu``. Besides exact
+    area names, a grant may end with ``*`` to cover every area below a prefix:
+
+    ```python
+    permissions = PermissionTrie({"finances.*": WRITE, "finances.payroll": READ})
+    permissions["finances.invoices.eu"]  # WRITE
+    permissions["finances.payroll"]  # READ, the most specific grant wins
+    "finances" in permissions  # False, "finances.*" only covers sub-areas
+    ```
+
+    A bare ``*`` grants every area. Grants are compiled into a trie on
+    creation, so a lookup walks the segments of the requested area once: its
+    cost is bounded by the area depth, not by the number of grants.
+
+    Iterating yields the grants as listed in the token. The instance is meant
+    to be read-only; mutating it does not update the trie.
+    """
+
+    def __init__(self, grants: Mapping[str, int]) -> None:
+        """
+        Compile grants into a trie.
+
+        Parameters
+        ----------
+        grants : Mapping[str, int]
+            Area name or wildcard pattern to access level.
+        """
+        super().__init__(grants)
+        self._root = _Node()
+        self._resolved: dict[str, int | None] = {}
+        for pattern, level in grants.items():
+            *path, last = pattern.split(SEPARATOR)
+            node = self._root
+            for segment in path:
+                node = node.children.setdefault(segment, _Node())
+            if last == WILDCARD:
+                node.wildcard = level
+            else:
+                node.children.setdefault(last, _Node()).level = level
+
+    def resolve(self, area: str) -> int | None:
+        """
+        Return the level granted on ``area``, None when nothing matches.
+
+        An exact grant wins over wildcards, and a deeper wildcard over a
+        shallower one. Results are memoized per area.
+        """
+        try:
+            return self._resolved[area]
+        except KeyError:
+            pass
+
+        node = self._root
+        best: int | None = None
+        for segment in area.split(SEPARATOR):
+            if node.wildcard is not None:
+                best = node.wildcard
+            child = node.children.get(segment)
+            if child is None:
+                break
+            node = child
+        else:
+            if node.level is not None:
+                best = node.level
+
+        self._resolved[area] = best
+        return best
+
+    def __getitem__(self, area: str) -> int:
+        """Return the level granted on ``area``, resolving wildcards."""
+        level = self.resolve(area)
+        if level is None:
+            raise KeyError(area)
+        return level
+
+    def __contains__(self, area: object) -> bool:
+        """Return whether any grant covers ``area``."""
+        return isinstance(area, str) and self.resolve(area) is not None
+
+    def get(self, area: str, default: Any = None) -> Any:  # type: ignore[override]
+        """Return the level granted on ``area``, or ``default``."""
+        level = self.resolve(area)
+        return default if level is None else level
+
+    @staticmethod
+    def has_wildcards(grants: Mapping[str, int]) -> bool:
+        """Return whether ``grants`` needs a trie, i.e. holds wildcard grants."""
+        return any(WILDCARD in pattern for pattern in grants)
+
+
+class AreaIndex:
+    """
+    Fixed position for each declared business area.
+
+    A permissions mapping is compiled once per request into a compact signed
+    byte vector, where ``vector[index.position(area)]`` holds the user level on
+    ``area`` (or :data:`MISSING`). Rules then compare integer positions instead
+    of hashing area names into the permissions dict on every check.
+
+    Usually built by an ``indexed`` :class:`missil.AreasBase` subclass:
+
+    ```python
+    class AppAreas(missil.AreasBase, indexed=True):
+        finances: missil.Area
+        it: missil.Area
+
+
+    index = AppAreas.area_index()
+    vector = index.vectorize({"finances": 1})  # array('b', [1, -128])
+    ```
+    """
+
+    def __init__(self, areas: Iterable[str]) -> None:
+        """
+        Assign positions to areas, in iteration order.
+
+        Parameters
+        ----------
+        areas : Iterable[str]
+            Business area names. Duplicates are rejected.
+
+        Raises
+        ------
+        ValueError
+            An area name appears more than once.
+        """
+        self.areas: tuple[str, ...] = tuple(areas)
+        self.positions: dict[str, int] = {
+            area: position for position, area in enumerate(self.areas)
+        }
+        if len(self.positions) != len(self.areas):
+            raise ValueError("AreaIndex area names must be unique.")
+
+        self._template = array("b", [MISSING]) * len(self.areas)
+        digest = hashlib.blake2b("\n".join(self.areas).encode(), digest_size=6)
+        self.fingerprint = base64.urlsafe_b64encode(digest.digest()).decode("ascii")
+        self._dependencies: dict[Callable[..., Any], Callable[..., Any]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed areas."""
+        return len(self.areas)
+
+    def position(self, area: str) -> int:
+        """
+        Return the vector position of ``area``.
+
+        Raises
+        ------
+        ValueError
+            The area is not part of this index.
+        """
+        try:
+            return self.positions[area]
+        except KeyError:
+            raise ValueError(f"'{area}' is not an indexed area.") from None
+
+    def vectorize(self, permissions: Mapping[str, int]) -> array:
+        """
+        Compile a permissions mapping into a level vector.
+
+        Parameters
+        ----------
+        permissions : Mapping[str, int]
+            User permissions, as returned by a TokenSource. Areas that are not
+            indexed are ignored.
+
+        Returns
+        -------
+        array
+            Signed byte vector of user levels, :data:`MISSING` where the user
+            has no entry. Levels are clamped to [-127, 127], so a negative
+            level still reads as an insufficient level rather than a missing
+            area.
+        """
+        vector = array("b", self._template)
+        if isinstance(permissions, PermissionTrie):
+            for offset, area in enumerate(self.areas):
+                granted = permissions.resolve(area)
+                if granted is not None:
+                    vector[offset] = max(_LOWEST, min(granted, _HIGHEST))
+            return vector
+
+        positions = self.positions
+        for area, level in permissions.items():
+            position = positions.get(area)
+            if position is not None:
+                vector[position] = max(_LOWEST, min(level, _HIGHEST))
+        return vector
+
+    def pack(self, permissions: Mapping[str, int]) -> str:
+        """
+        Encode permissions as a compact string, to be used as the claim value.
+
+        A JSON object of area names grows every token by the length of each
+        name. Packed permissions only carry one byte per indexed area, in index
+        order, as ``p1.<fingerprint>.<base64url levels>``. The fingerprint
+        identifies the area ordering, so tokens packed against other areas
+        are rejected on expansion instead of granting the wrong areas.
+
+        ```python
+        index = AppAreas.area_index()
+        claims = {"sub": "john", "permissions": index.pack({"finances": WRITE})}
+        ```
+
+        Parameters
+        ----------
+        permissions : Mapping[str, int]
+            User permissions. Wildcard grants are resolved against the indexed
+            areas, and areas that are not indexed are dropped.
+
+        Returns
+        -------
+        str
+            Packed permissions, expanded back by :meth:`unpack`.
+        """
+        levels = self.vectorize(permissions).tobytes()
+        data = base64.urlsafe_b64encode(levels).rstrip(b"=").decode("ascii")
+        return f"{PACKED_VERSION}.{self.fingerprint}.{data}"
+
+    def unpack(self, packed: str) -> dict[str, int]:
+        """
+        Expand permissions encoded by :meth:`pack`.
+
+        Parameters
+        ----------
+        packed : str
+            Packed permissions.
+
+        Returns
+        -------
+        dict[str, int]
+            Area name to level, without the areas the user has no entry for.
+
+        Raises
+        ------
+        ValueError
+            The value is malformed, of an unknown version, or was packed
+            against another area ordering.
+        """
+        parts = packed.split(".", 2)
+        if len(parts) != 3:
+            raise ValueError("Malformed packed permissions.")
+        version, fingerprint, data = parts
+        if version != PACKED_VERSION:
+            raise ValueError(f"Unknown packed permissions version '{version}'.")
+        if fingerprint != self.fingerprint:
+            raise ValueError("Permissions were packed against other areas.")
+
+        vector = array("b", base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)))
+        if len(vector) != len(self.areas):
+            raise ValueError("Packed permissions do not match the indexed areas.")
+        return {
+            area: level
+            for area, level in zip(self.areas, vector, strict=True)
+            if level != MISSING
+        }
+
+    def granted(self, vector: array, level: int) -> list[str]:
+        """
+        List every area on which a compiled vector grants at least ``level``.
+
+        Parameters
+        ----------
+        vector : array
+            Level vector built by :meth:`vectorize`.
+        level : int
+            Minimum access level.
+
+        Returns
+        -------
+        list[str]
+            Area names, in index order.
+        """
+        return [
+            area
+            for area, value in zip(self.areas, vector, strict=True)
+            if value >= level
+        ]
+
+    def dependency(self, bearer: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Return the FastAPI dependency compiling ``bearer`` permissions.
+
+        The same callable is returned for a given bearer, so FastAPI's
+        per-request dependency cache builds the vector once no matter how many
+        rules and roles depend on it.
+
+        Parameters
+        ----------
+        bearer : Callable[..., Any]
+            TokenSource whose permissions get compiled.
+
+        Returns
+        -------
+        Callable[..., Any]
+            Dependency resolving to ``(claims, vector)``.
+        """
+        if bearer not in self._dependencies:
+
+            async def vectorize_permissions(
+                claims: Annotated[
+                    tuple[JWTClaims, dict[str, int]], FastAPIDependsFunc(bearer)
+                ],
+            ) -> tuple[JWTClaims, array]:
+                """Compile the request permissions into an area level vector."""
+                return claims[0], self.vectorize(claims[1])
+
+            self._dependencies[bearer] = vectorize_permissions
+
+        return self._dependencies[bearer]
@@ -0,0 +1,233 @@
+"""Route to access policy compilation."""
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any
+from typing import NamedTuple
+
+from fastapi import routing as fastapi_routing
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from fastapi.routing import APIWebSocketRoute
+from starlette.routing import BaseRoute
+from starlette.routing import Mount
+from starlette.types import Scope
+
+from missil.rules import LEVEL_NAMES
+from missil.rules import RULE_ATTRIBUTE
+from missil.rules import AccessRule
+from missil.rules import Role
+from missil.rules import check_access
+
+
+_iter_route_contexts = getattr(fastapi_routing, "iter_route_contexts", None)
+
+
+class RoutePolicy(NamedTuple):
+    """Access rules protecting a single route."""
+
+    route: BaseRoute
+    path: str
+    methods: frozenset[str]
+    name: str
+    rules: tuple[AccessRule | Role, ...]
+
+    @property
+    def requirements(self) -> tuple[tuple[str, int], ...]:
+        """Every (area, level) pair the route requires, roles flattened."""
+        pairs: list[tuple[str, int]] = []
+        for rule in self.rules:
+            for access_rule in rule.rules if isinstance(rule, Role) else (rule,):
+                pair = (access_rule.area, access_rule.level)
+                if pair not in pairs:
+                    pairs.append(pair)
+        return tuple(pairs)
+
+
+class PolicyTable:
+    """
+    Frozen route to access policy lookup table.
+
+    Built by :func:`compile_policy` from an application's routes. FastAPI
+    stores the matched route in ``scope["route"]`` right after routing, so a
+    middleware or custom route class can find the route policy with
+    :meth:`for_scope` and enforce it upfront. :meth:`rows` dumps the whole
+    route/permission matrix, e.g. for audits.
+    """
+
+    def __init__(self, policies: Iterable[RoutePolicy]) -> None:
+        """
+        Freeze route policies into a lookup table.
+
+        Parameters
+        ----------
+        policies : Iterable[RoutePolicy]
+            Policy of each route, in routing order.
+        """
+        # Routes are unhashable; policies keep them alive, so ids stay unique.
+        self._policies: Mapping[int, RoutePolicy] = MappingProxyType(
+            {id(policy.route): policy for policy in policies}
+        )
+
+    def __iter__(self) -> Iterator[RoutePolicy]:
+        """Iterate over route policies, in routing order."""
+        return iter(self._policies.values())
+
+    def __len__(self) -> int:
+        """Return the number of compiled routes."""
+        return len(self._policies)
+
+    def for_route(self, route: BaseRoute) -> RoutePolicy | None:
+        """Return the policy of a route object, if it was compiled."""
+        return self._policies.get(id(route))
+
+    def for_scope(self, scope: Scope) -> RoutePolicy | None:
+        """Return the policy of the route FastAPI matched for ``scope``."""
+        route = scope.get("route")
+        return None if route is None else self._policies.get(id(route))
+
+    def lookup(self, path: str, method: str = "GET") -> RoutePolicy | None:
+        """
+        Find a route policy by path template and method.
+
+        Parameters
+        ----------
+        path : str
+            Route path template, e.g. "/items/{item_id}".
+        method : str, optional
+            HTTP method, by default "GET". Ignored for websocket routes.
+
+        Returns
+        -------
+        RoutePolicy | None
+            Matching route policy.
+        """
+        for policy in self._policies.values():
+            if policy.path == path and (not policy.methods or method in policy.methods):
+                return policy
+        return None
+
+    def enforce(self, route: BaseRoute, permissions: Mapping[str, int]) -> None:
+        """
+        Check user permissions against every rule protecting a route.
+
+        Parameters
+        ----------
+        route : BaseRoute
+            Matched route.
+        permissions : Mapping[str, int]
+            User permissions, as returned by a TokenSource.
+
+        Raises
+        ------
+        PermissionDeniedException
+            A required area is missing or its level is insufficient.
+        """
+        policy = self._policies.get(id(route))
+        if policy is None:
+            return
+        for area, level in policy.requirements:
+            check_access(permissions, area, level)
+
+    def rows(self) -> list[dict[str, Any]]:
+        """
+        Dump the route/permission matrix.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            One JSON-serializable row per route, with its path, sorted methods,
+            name and requirements formatted as ``"area:LEVEL"``.
+        """
+        return [
+            {
+                "path": policy.path,
+                "methods": sorted(policy.methods),
+                "name": policy.name,
+                "requirements": [
+                    f"{area}:{LEVEL_NAMES.get(level, level)}"
+                    for area, level in policy.requirements
+                ],
+            }
+            for policy in self._policies.values()
+        ]
+
+
+def compile_policy(app: Any) -> PolicyTable:
+    """
+    Collect the AccessRules and Roles protecting every route of an app.
+
+    Rules are found wherever FastAPI resolves them: route and router
+    ``dependencies`` (including nested ``include_router`` chains, which
+    FastAPI flattens into each route) and endpoint parameters. Mounted
+    sub-applications are walked too.
+
+    ```python
+    app.include_router(finances_router)
+    policy = missil.compile_policy(app)
+
+    for row in policy.rows():
+        print(row)
+    ```
+
+    Parameters
+    ----------
+    app : Any
+        FastAPI application or router, or anything with a ``routes`` list.
+
+    Returns
+    -------
+    PolicyTable
+        Frozen lookup table of route policies. Unprotected routes are included
+        with no rules.
+    """
+    policies: list[RoutePolicy] = []
+    _collect_routes(app.routes, "", policies)
+    return PolicyTable(policies)
+
+
+def _iter_routes(routes: list[BaseRoute]) -> Iterator[tuple[BaseRoute, Any]]:
+    """
+    Yield each route with the object describing its effective state.
+
+    Recent FastAPI versions include routers lazily and expose the effective
+    path and dependencies of included routes through ``iter_route_contexts``;
+    older ones copy included routes into the parent router.
+    """
+    if _iter_route_contexts is None:
+        for route in routes:
+            yield route, route
+    else:
+        for context in _iter_route_contexts(routes):
+            yield context.original_route, context
+
+
+def _collect_routes(
+    routes: list[BaseRoute], prefix: str, policies: list[RoutePolicy]
+) -> None:
+    for route, effective in _iter_routes(routes):
+        if isinstance(route, (APIRoute, APIWebSocketRoute)):
+            policy = RoutePolicy(
+                route=route,
+                path=prefix + effective.path,
+                methods=frozenset(getattr(effective, "methods", None) or ()),
+                name=effective.name,
+                rules=tuple(_collect_rules(effective.dependant, [])),
+            )
+            policies.append(policy)
+        elif isinstance(route, Mount):
+            _collect_routes(route.routes, prefix + effective.path, policies)
+
+
+def _collect_rules(
+    dependant: Dependant, found: list[AccessRule | Role]
+) -> list[AccessRule | Role]:
+    for sub_dependant in dependant.dependencies:
+        rule = getattr(sub_dependant.call, RULE_ATTRIBUTE, None)
+        if rule is None:
+            _collect_rules(sub_dependant, found)
+        elif rule not in found:
+            found.append(rule)
+    return found
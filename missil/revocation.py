@@ -0,0 +1,474 @@
+"""Revocation lists of token ids (``jti``) and subjects (``sub``)."""
+
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any
+from typing import NamedTuple
+
+
+log = logging.getLogger(__name__)
+
+JTI = "jti"
+SUB = "sub"
+
+MAGIC = b"MSLREV1\0"
+_HEADER = struct.Struct("<8sQQIIQ")
+_HEADER_SIZE = 64
+_SLOT = struct.Struct("<16sqq")
+_EMPTY = bytes(16)
+_BLOOM_BITS_PER_ENTRY = 10
+_BLOOM_HASHES = 7
+
+
+class RevokedEntry(NamedTuple):
+    """A revoked token id or subject."""
+
+    kind: str
+    """``"jti"`` or ``"sub"``."""
+    value: str
+    expires_at: float
+    """Unix time after which the entry is dropped, usually the token ``exp``."""
+    revoked_at: float = 0.0
+    """For subjects, tokens issued (``iat``) up to this time are revoked."""
+
+
+class RevocationList(ABC):
+    """
+    Base class for token revocation lists consulted by bearers after decoding.
+
+    A token is revoked when its ``jti`` is listed, or, with ``check_subjects``,
+    when its ``sub`` is listed and the token was issued (``iat``) at or before
+    the subject was revoked. Tokens issued afterwards, e.g. on the next login,
+    are accepted again. Entries carry their own expiry and stop counting once
+    the revoked tokens would have expired anyway.
+    """
+
+    def __init__(self, *, check_subjects: bool = False) -> None:
+        """
+        Configure which claims are checked.
+
+        Parameters
+        ----------
+        check_subjects : bool, optional
+            Also look the ``sub`` claim up, by default False.
+        """
+        self.check_subjects = check_subjects
+
+    @abstractmethod
+    def lookup(self, kind: str, value: str) -> float | None:
+        """
+        Return the ``revoked_at`` of a live entry, or None when not listed.
+
+        Parameters
+        ----------
+        kind : str
+            ``"jti"`` or ``"sub"``.
+        value : str
+            Claim value.
+        """
+
+    def is_revoked(self, claims: Mapping[str, Any]) -> bool:
+        """
+        Check decoded token claims against the list.
+
+        Parameters
+        ----------
+        claims : Mapping[str, Any]
+            Decoded and verified JWT claims.
+
+        Returns
+        -------
+        bool
+            Whether the token has been revoked.
+        """
+        jti = claims.get(JTI)
+        if jti is not None and self.lookup(JTI, str(jti)) is not None:
+            return True
+
+        if self.check_subjects:
+            sub = claims.get(SUB)
+            if sub is not None:
+                revoked_at = self.lookup(SUB, str(sub))
+                if revoked_at is not None:
+                    issued_at = claims.get("iat")
+                    return not isinstance(issued_at, (int, float)) or (
+                        issued_at <= revoked_at
+                    )
+
+        return False
+
+
+class MemoryRevocationList(RevocationList):
+    """
+    Revocation list held in process memory.
+
+    Suited to a single worker, or as the writable source that periodically
+    publishes a file for :class:`MappedRevocationList`:
+
+    ```python
+    revocations = missil.MemoryRevocationList()
+    revocations.revoke(claims["jti"], expires_at=claims["exp"])
+    revocations.save("/run/missil/revoked.bin")
+    ```
+
+    Expired entries are dropped by :meth:`purge`, which revoking runs every
+    ``purge_interval`` seconds.
+    """
+
+    def __init__(
+        self, *, check_subjects: bool = False, purge_interval: float = 60.0
+    ) -> None:
+        """
+        Create an empty list.
+
+        Parameters
+        ----------
+        check_subjects : bool, optional
+            Also look the ``sub`` claim up, by default False.
+        purge_interval : float, optional
+            Seconds between the purges of expired entries run when revoking,
+            by default 60.
+        """
+        super().__init__(check_subjects=check_subjects)
+        self.purge_interval = purge_interval
+        self._entries: dict[tuple[str, str], tuple[float, float]] = {}
+        self._next_purge = time.monotonic() + purge_interval
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones not purged yet."""
+        return len(self._entries)
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke a single token.
+
+        Parameters
+        ----------
+        jti : str
+            Token id (``jti`` claim).
+        expires_at : float
+            Unix time when the token expires (its ``exp`` claim).
+        """
+        with self._lock:
+            self._entries[(JTI, jti)] = (float(expires_at), 0.0)
+            self._purge_due()
+
+    def revoke_subject(
+        self, sub: str, expires_at: float, revoked_at: float | None = None
+    ) -> None:
+        """
+        Revoke every token of a subject issued up to ``revoked_at``.
+
+        Parameters
+        ----------
+        sub : str
+            Subject (``sub`` claim).
+        expires_at : float
+            Unix time when the last affected token expires, usually now plus
+            the maximum token lifetime.
+        revoked_at : float, optional
+            Tokens issued at or before this Unix time are revoked, by default
+            now.
+        """
+        revoked_at = time.time() if revoked_at is None else revoked_at
+        with self._lock:
+            self._entries[(SUB, sub)] = (float(expires_at), float(revoked_at))
+            self._purge_due()
+
+    def unrevoke(self, kind: str, value: str) -> None:
+        """Remove an entry, if present."""
+        with self._lock:
+            self._entries.pop((kind, value), None)
+
+    def lookup(self, kind: str, value: str) -> float | None:
+        """Return the ``revoked_at`` of a live entry, or None when not listed."""
+        entry = self._entries.get((kind, value))
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def purge(self) -> int:
+        """Drop expired entries and return how many were dropped."""
+        with self._lock:
+            return self._purge()
+
+    def _purge(self) -> int:
+        """Drop expired entries, with the lock held."""
+        now = time.time()
+        expired = [key for key, (exp, _) in self._entries.items() if exp <= now]
+        for key in expired:
+            del self._entries[key]
+        self._next_purge = time.monotonic() + self.purge_interval
+        return len(expired)
+
+    def _purge_due(self) -> None:
+        """Purge once ``purge_interval`` has passed, with the lock held."""
+        if time.monotonic() >= self._next_purge:
+            self._purge()
+
+    def entries(self) -> Iterator[RevokedEntry]:
+        """Iterate over the live entries."""
+        now = time.time()
+        with self._lock:
+            items = list(self._entries.items())
+        for (kind, value), (expires_at, revoked_at) in items:
+            if expires_at > now:
+                yield RevokedEntry(kind, value, expires_at, revoked_at)
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Atomically publish the live entries for :class:`MappedRevocationList`."""
+        MappedRevocationList.write(path, self.entries())
+
+
+class MappedRevocationList(RevocationList):
+    """
+    Read-only revocation list memory-mapped from a compact file.
+
+    Every worker process maps the same file, so the list lives once in the
+    OS page cache however many workers there are. The file holds a Bloom
+    filter in front of an open-addressing hash table of 16 byte BLAKE2b
+    fingerprints: most tokens are cleared after a few bit probes, and listed
+    ones cost a single table probe, whether the list has a hundred or a few
+    million entries.
+
+    The file is written with :meth:`write` (or
+    :meth:`MemoryRevocationList.save`), which replaces it atomically. Readers
+    notice the new file within ``check_interval`` seconds and switch to it
+    without locking lookups:
+
+    ```python
+    # publisher, e.g. a cron job fed by the user database
+    missil.MappedRevocationList.write("/run/missil/revoked.bin", entries)
+
+    # every worker
+    bearer = missil.TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        revocations=missil.MappedRevocationList("/run/missil/revoked.bin"),
+    )
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        check_interval: float = 1.0,
+        check_subjects: bool = False,
+    ) -> None:
+        """
+        Map a revocation list file.
+
+        A missing file is treated as an empty list until it appears.
+
+        Parameters
+        ----------
+        path : str | os.PathLike[str]
+            Revocation list file.
+        check_interval : float, optional
+            Minimum seconds between checks for a replaced file, by default 1.
+        check_subjects : bool, optional
+            Also look the ``sub`` claim up, by default False.
+        """
+        super().__init__(check_subjects=check_subjects)
+        self.path = os.fspath(path)
+        self.check_interval = check_interval
+        self._view: _MappedView | None = None
+        self._identity: tuple[int, int, int] | None = None
+        self._next_check = float("-inf")
+        self._reload_lock = threading.Lock()
+        self.reload()
+
+    def __len__(self) -> int:
+        """Return the number of entries in the mapped file."""
+        view = self._view
+        return 0 if view is None else view.count
+
+    def reload(self) -> bool:
+        """
+        Map the file again if it was replaced since the last check.
+
+        Returns
+        -------
+        bool
+            Whether a new file was mapped.
+        """
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._view, self._identity = None, None
+                return False
+
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if identity == self._identity:
+                return False
+
+            try:
+                view = _MappedView.open(self.path)
+            except (OSError, ValueError, struct.error) as e:
+                # Keep serving the previous list, and only retry once the
+                # file changes again.
+                self._identity = identity
+                log.warning("Cannot load revocation list %s: %s", self.path, e)
+                return False
+
+            # Readers holding the previous view keep it alive until they are
+            # done; it is unmapped once garbage collected.
+            self._view, self._identity = view, identity
+            return True
+
+    def lookup(self, kind: str, value: str) -> float | None:
+        """Return the ``revoked_at`` of a live entry, or None when not listed."""
+        if time.monotonic() >= self._next_check:
+            self.reload()
+
+        view = self._view
+        if view is None:
+            return None
+        return view.lookup(_fingerprint(kind, value))
+
+    @staticmethod
+    def write(path: str | os.PathLike[str], entries: Iterable[RevokedEntry]) -> int:
+        """
+        Atomically write a revocation list file.
+
+        Expired entries are left out. The file is written next to ``path``
+        and renamed over it, so readers never see a partial file.
+
+        Parameters
+        ----------
+        path : str | os.PathLike[str]
+            Destination file.
+        entries : Iterable[RevokedEntry]
+            Entries to publish.
+
+        Returns
+        -------
+        int
+            Number of entries written.
+        """
+        now = time.time()
+        live = {
+            _fingerprint(entry.kind, entry.value): entry
+            for entry in entries
+            if entry.expires_at > now
+        }
+        data = _build(live)
+
+        directory = os.path.dirname(os.fspath(path)) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".revoked-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(live)
+
+
+class _MappedView:
+    """One mapped revocation list file."""
+
+    def __init__(self, buffer: mmap.mmap | bytes) -> None:
+        """Validate the header and locate the Bloom filter and table."""
+        magic, count, bloom_bits, hashes, _, slots = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("not a missil revocation list")
+        self.buffer = buffer
+        self.count = count
+        self.bloom_mask = bloom_bits - 1
+        self.hashes = hashes
+        self.table_offset = _HEADER_SIZE + bloom_bits // 8
+        self.slot_mask = slots - 1
+        if len(buffer) != self.table_offset + slots * _SLOT.size:
+            raise ValueError("truncated missil revocation list")
+
+    @classmethod
+    def open(cls, path: str) -> "_MappedView":
+        """Map a file read-only."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def lookup(self, fingerprint: bytes) -> float | None:
+        """Return the ``revoked_at`` of a live entry, or None when not listed."""
+        buffer = self.buffer
+        h1, h2 = _hashes(fingerprint)
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) & self.bloom_mask
+            if not buffer[_HEADER_SIZE + (bit >> 3)] & (1 << (bit & 7)):
+                return None
+
+        slot = h2 & self.slot_mask
+        while True:
+            offset = self.table_offset + slot * _SLOT.size
+            stored, expires_at, revoked_at = _SLOT.unpack_from(buffer, offset)
+            if stored == fingerprint:
+                return revoked_at / 1e6 if expires_at > time.time() else None
+            if stored == _EMPTY:
+                return None
+            slot = (slot + 1) & self.slot_mask
+
+
+def _fingerprint(kind: str, value: str) -> bytes:
+    """Return the 16 byte BLAKE2b digest identifying an entry."""
+    return hashlib.blake2b(f"{kind}\0{value}".encode(), digest_size=16).digest()
+
+
+def _hashes(fingerprint: bytes) -> tuple[int, int]:
+    """Split a fingerprint into the two hashes driving Bloom and table probes."""
+    return (
+        int.from_bytes(fingerprint[:8], "little"),
+        int.from_bytes(fingerprint[8:], "little") | 1,
+    )
+
+
+def _power_of_two(n: int) -> int:
+    """Return the smallest power of two of at least ``n`` (and at least 2)."""
+    return 1 << max(n - 1, 1).bit_length()
+
+
+def _build(entries: Mapping[bytes, RevokedEntry]) -> bytes:
+    """Serialize fingerprinted entries into the mapped file layout."""
+    bloom_bits = max(64, _power_of_two(len(entries) * _BLOOM_BITS_PER_ENTRY))
+    slots = max(2, _power_of_two(len(entries) * 2))
+    bloom_mask, slot_mask = bloom_bits - 1, slots - 1
+
+    bloom = bytearray(bloom_bits // 8)
+    table = bytearray(slots * _SLOT.size)
+    for fingerprint, entry in entries.items():
+        h1, h2 = _hashes(fingerprint)
+        for i in range(_BLOOM_HASHES):
+            bit = (h1 + i * h2) & bloom_mask
+            bloom[bit >> 3] |= 1 << (bit & 7)
+
+        slot = h2 & slot_mask
+        while table[slot * _SLOT.size : slot * _SLOT.size + 16] != _EMPTY:
+            slot = (slot + 1) & slot_mask
+        _SLOT.pack_into(
+            table,
+            slot * _SLOT.size,
+            fingerprint,
+            int(entry.expires_at),
+            int(entry.revoked_at * 1e6),
+        )
+
+    header = _HEADER.pack(MAGIC, len(entries), bloom_bits, _BLOOM_HASHES, 0, slots)
+    return header.ljust(_HEADER_SIZE, b"\0") + bytes(bloom) + bytes(table)
@@ -17,6 +17,31 @@ from starlette.types import Lifespan
 
 from missil._deprecated import make_deprecated_getattr
 from missil.rules import AccessRule
+from missil.rules import merge_rules
+
+
+class ProtectedRoute(APIRoute):
+    """
+    FastAPI route running each access check once.
+
+    Before the route dependencies are solved, rules already enforced by a
+    stronger or identical rule of the route are dropped, see
+    :func:`missil.merge_rules`. It is the default route class of
+    :class:`ProtectedRouter`, and can be set on any APIRouter or app.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint: Callable[..., Any],
+        *,
+        dependencies: Sequence[FastAPIDependsClass] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Create the route with its merged dependencies."""
+        super().__init__(
+            path, endpoint, dependencies=merge_rules(dependencies or ()), **kwargs
+        )
 
 
 class ProtectedRouter(APIRouter):
@@ -36,7 +61,7 @@ class ProtectedRouter(APIRouter):
         redirect_slashes: bool = True,
         default: ASGIApp | None = None,
         dependency_overrides_provider: Any | None = None,
-        route_class: type[APIRoute] = APIRoute,
+        route_class: type[APIRoute] = ProtectedRoute,
         on_startup: Sequence[Callable[[], Any]] | None = None,
         on_shutdown: Sequence[Callable[[], Any]] | None = None,
         lifespan: Lifespan[Any] | None = None,
@@ -57,12 +82,18 @@ class ProtectedRouter(APIRouter):
         router = missil.ProtectedRouter(rules=[areas["finances"].READ])
         ```
 
+        An endpoint rule on the same area as a router rule replaces it when
+        it is stronger, instead of running both checks (see
+        :class:`ProtectedRoute`).
+
         All other parameters are identical to FastAPI's APIRouter.
 
         Parameters
         ----------
         rules : Sequence[AccessRule]
             One or more Missil AccessRule objects to enforce on every route.
+        route_class : type[APIRoute], optional
+            Class of the routes, by default :class:`ProtectedRoute`.
         """
         super().__init__(
             prefix=prefix,
@@ -84,7 +115,7 @@ class ProtectedRouter(APIRouter):
             generate_unique_id_function=generate_unique_id_function,
         )
 
-        self.dependencies += rules
+        self.dependencies = merge_rules([*self.dependencies, *rules])
 
 
 __getattr__ = make_deprecated_getattr(
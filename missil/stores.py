@@ -0,0 +1,291 @@
+"""Permission stores, for tokens carrying only a subject."""
+
+from abc import ABC
+from abc import abstractmethod
+import asyncio
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Mapping
+import os
+import sqlite3
+import threading
+import time
+
+from missil.permissions import PermissionTrie
+
+
+Listener = Callable[[str | None], None]
+"""Invalidation hook, called with a changed subject or None for all."""
+
+
+class PermissionStore(ABC):
+    """
+    Base class for sources of user permissions keyed by subject.
+
+    With a store, tokens only identify the user (``sub``) and permission
+    changes take effect without reissuing tokens. Stores are read through a
+    :class:`PermissionResolver`, which caches and coalesces lookups.
+
+    Subclass it and implement :meth:`load` to read permissions from another
+    database. Call :meth:`notify` after changing permissions, so that
+    resolvers subscribed to the store drop their cached copy.
+    """
+
+    def __init__(self) -> None:
+        """Create a store without subscribers."""
+        self._listeners: list[Listener] = []
+
+    @abstractmethod
+    async def load(self, subject: str) -> Mapping[str, int]:
+        """
+        Return the permissions of ``subject``.
+
+        Returns
+        -------
+        Mapping[str, int]
+            Area name to level, empty when the subject is unknown.
+        """
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call ``listener`` with each changed subject, or None for all."""
+        self._listeners.append(listener)
+
+    def notify(self, subject: str | None = None) -> None:
+        """Tell subscribers that ``subject`` (by default everyone) changed."""
+        for listener in self._listeners:
+            listener(subject)
+
+
+class MemoryPermissionStore(PermissionStore):
+    """
+    Permissions kept in a dict, e.g. loaded from a config file at startup.
+
+    ```python
+    store = missil.MemoryPermissionStore({"john": {"finances": missil.WRITE}})
+    store.set("jane", {"finances.*": missil.READ})
+    ```
+    """
+
+    def __init__(self, permissions: Mapping[str, Mapping[str, int]] | None = None):
+        """
+        Create a store.
+
+        Parameters
+        ----------
+        permissions : Mapping[str, Mapping[str, int]], optional
+            Initial subject to permissions mapping.
+        """
+        super().__init__()
+        self._permissions = {
+            subject: dict(grants) for subject, grants in (permissions or {}).items()
+        }
+
+    async def load(self, subject: str) -> Mapping[str, int]:
+        """Return the permissions of ``subject``."""
+        return self._permissions.get(subject, {})
+
+    def set(self, subject: str, permissions: Mapping[str, int]) -> None:
+        """Replace the permissions of ``subject``."""
+        self._permissions[subject] = dict(permissions)
+        self.notify(subject)
+
+    def remove(self, subject: str) -> None:
+        """Drop every permission of ``subject``."""
+        self._permissions.pop(subject, None)
+        self.notify(subject)
+
+
+class SQLitePermissionStore(PermissionStore):
+    """
+    Permissions kept in a SQLite table of ``(subject, area, level)`` rows.
+
+    Queries run in a worker thread, off the event loop. Changes made through
+    :meth:`set` and :meth:`remove` reach subscribed resolvers at once; changes
+    made by other processes are picked up when cached entries expire, or
+    after an explicit :meth:`PermissionResolver.invalidate`.
+
+    ```python
+    store = missil.SQLitePermissionStore("permissions.db")
+    store.set("john", {"finances": missil.WRITE, "it.*": missil.READ})
+    ```
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], table: str = "missil_permissions"
+    ) -> None:
+        """
+        Open the database, creating the table if needed.
+
+        Parameters
+        ----------
+        path : str | os.PathLike[str]
+            Database file, or ":memory:".
+        table : str, optional
+            Table name, by default "missil_permissions".
+        """
+        super().__init__()
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'.")
+
+        self.table = table
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "subject TEXT NOT NULL, area TEXT NOT NULL, level INTEGER NOT NULL, "
+                "PRIMARY KEY (subject, area))"
+            )
+
+    async def load(self, subject: str) -> Mapping[str, int]:
+        """Return the permissions of ``subject``, queried in a worker thread."""
+        return await asyncio.to_thread(self.load_sync, subject)
+
+    def load_sync(self, subject: str) -> dict[str, int]:
+        """Return the permissions of ``subject``, blocking."""
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT area, level FROM {self.table} WHERE subject = ?", (subject,)
+            ).fetchall()
+        return dict(rows)
+
+    def set(self, subject: str, permissions: Mapping[str, int]) -> None:
+        """Replace the permissions of ``subject`` in one transaction."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE subject = ?", (subject,)
+            )
+            self._connection.executemany(
+                f"INSERT INTO {self.table} (subject, area, level) VALUES (?, ?, ?)",
+                [(subject, area, level) for area, level in permissions.items()],
+            )
+        self.notify(subject)
+
+    def remove(self, subject: str) -> None:
+        """Drop every permission of ``subject``."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE subject = ?", (subject,)
+            )
+        self.notify(subject)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+
+class PermissionResolver:
+    """
+    Async TTL cache in front of a :class:`PermissionStore`.
+
+    Concurrent requests for a subject that is not cached share a single store
+    lookup. Entries expire after ``ttl`` seconds, and are dropped at once when
+    the store reports a change or :meth:`invalidate` is called, e.g. from a
+    message queue consumer when another service edits permissions.
+
+    ```python
+    resolver = missil.PermissionResolver(missil.SQLitePermissionStore("perms.db"))
+    bearer = missil.TokenBearer(
+        "Authorization", SECRET_KEY, permission_resolver=resolver
+    )
+    ```
+    """
+
+    def __init__(
+        self, store: PermissionStore, *, ttl: float = 30.0, maxsize: int = 10_000
+    ) -> None:
+        """
+        Create a resolver and subscribe it to ``store`` changes.
+
+        Parameters
+        ----------
+        store : PermissionStore
+            Source of permissions.
+        ttl : float, optional
+            Seconds a subject's permissions are reused, by default 30.
+        maxsize : int, optional
+            Maximum number of cached subjects, by default 10000. The least
+            recently used goes first.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+
+        self.store = store
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.loads = 0
+        self._entries: OrderedDict[str, tuple[float, dict[str, int]]] = OrderedDict()
+        self._loading: dict[str, asyncio.Future[dict[str, int]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        store.subscribe(self.invalidate)
+
+    def __len__(self) -> int:
+        """Return the number of cached subjects."""
+        return len(self._entries)
+
+    async def get(self, subject: str) -> dict[str, int]:
+        """
+        Return the permissions of ``subject``, from cache when fresh.
+
+        Permissions holding wildcard grants are compiled into a
+        :class:`missil.PermissionTrie` once per load.
+        """
+        entry = self._entries.get(subject)
+        if entry is not None and entry[0] > time.monotonic():
+            with self._lock:
+                if subject in self._entries:
+                    self._entries.move_to_end(subject)
+            return entry[1]
+
+        future = self._loading.get(subject)
+        if future is None:
+            future = asyncio.ensure_future(self._load(subject, self._generation))
+            self._loading[subject] = future
+        # Shielded so that one cancelled request does not abort the lookup
+        # shared with the others.
+        return await asyncio.shield(future)
+
+    async def _load(self, subject: str, generation: int) -> dict[str, int]:
+        """Query the store and cache the result, unless invalidated meanwhile."""
+        task = asyncio.current_task()
+        try:
+            self.loads += 1
+            grants = await self.store.load(subject)
+            permissions = (
+                PermissionTrie(grants)
+                if PermissionTrie.has_wildcards(grants)
+                else dict(grants)
+            )
+            with self._lock:
+                # Invalidating the subject, or everyone, takes the lookup out
+                # of ``_loading``, so owning the slot means nothing changed.
+                if (
+                    generation == self._generation
+                    and self._loading.get(subject) is task
+                ):
+                    self._entries[subject] = (time.monotonic() + self.ttl, permissions)
+                    self._entries.move_to_end(subject)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            return permissions
+        finally:
+            if self._loading.get(subject) is task:
+                del self._loading[subject]
+
+    def invalidate(self, subject: str | None = None) -> None:
+        """
+        Drop the cached permissions of ``subject``, or of everyone.
+
+        Lookups already in flight for the invalidated subjects still answer
+        their waiting requests but are not cached, so the next request reads
+        the store again. Other subjects stay cached.
+        """
+        with self._lock:
+            if subject is None:
+                self._generation += 1
+                self._entries.clear()
+                self._loading.clear()
+            else:
+                self._entries.pop(subject, None)
+                self._loading.pop(subject, None)
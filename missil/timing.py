@@ -0,0 +1,55 @@
+"""Per-request timing of the authentication stages."""
+
+from contextvars import ContextVar
+
+
+TIMINGS_STATE_KEY = "missil_timings"
+"""Request ``state`` key holding the :class:`StageTimings` of a request."""
+
+EXTRACT = "extract"
+DECODE = "decode"
+CHECK = "check"
+
+current_timings: ContextVar["StageTimings | None"] = ContextVar(
+    "missil_timings", default=None
+)
+"""Timings of the request being handled, set by ServerTimingMiddleware."""
+
+
+class StageTimings:
+    """
+    Accumulated durations of each authentication stage of one request.
+
+    Stages are ``extract`` (reading the token from cookies or headers),
+    ``decode`` (signature verification, absent on cache hits) and ``check``
+    (rule and role evaluation). A stage that runs several times in a request,
+    such as the checks of many rules, accumulates.
+    """
+
+    def __init__(self) -> None:
+        """Create empty timings."""
+        self.stages: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Add ``seconds``, measured with a monotonic clock, to ``stage``."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in all stages."""
+        return sum(self.stages.values())
+
+    def server_timing(self, prefix: str = "missil-") -> str:
+        """
+        Render the stages as a ``Server-Timing`` header value.
+
+        Returns
+        -------
+        str
+            E.g. ``missil-extract;dur=0.004, missil-decode;dur=0.812``, with
+            durations in milliseconds.
+        """
+        return ", ".join(
+            f"{prefix}{stage};dur={seconds * 1000:.3f}"
+            for stage, seconds in self.stages.items()
+        )
@@ -0,0 +1,413 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import FastAPI
+from fastapi import WebSocket
+import pytest
+from starlette.requests import HTTPConnection
+from starlette.testclient import TestClient
+
+from missil import READ
+from missil import AccessRule
+from missil import AreaIndex
+from missil import HeaderTokenBearer
+from missil import KeyManager
+from missil import RejectedTokenCache
+from missil import StaticKeyManager
+from missil import TokenBearer
+from missil import TokenCache
+from missil import TokenMinter
+from missil import encode_jwt_token
+from missil.exceptions import TokenValidationException
+from missil.exceptions import VerificationOverloadedException
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
+class BlockingKeyManager(KeyManager):
+    """Hold every key lookup until released, to keep verifications in flight."""
+
+    def __init__(self):  # noqa: D107
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+
+    def get_key(self, token):  # noqa: D102
+        self.started.release()
+        self.release.wait(5)
+        return StaticKeyManager(SECRET_KEY).key
+
+
+@pytest.fixture(scope="module")
+def thread_pool():
+    with ThreadPoolExecutor(2) as pool:
+        yield pool
+
+
+def test_thread_executor(thread_pool):
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", executor=thread_pool
+    )
+    token = encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+
+    _, permissions = asyncio.run(bearer.authenticate(token))
+    assert permissions == {"finances": 1}
+
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        asyncio.run(bearer.authenticate(token[:-2]))
+
+
+@pytest.mark.parametrize("valid", [True, False], ids=["valid", "invalid"])
+def test_concurrent_verifications_are_coalesced(thread_pool, monkeypatch, valid):
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", executor=thread_pool
+    )
+    token = encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+    token = token if valid else token[:-2]
+    decoded = []
+    decode_jwt = bearer.decode_jwt
+
+    def slow_decode(t):
+        decoded.append(t)
+        time.sleep(0.05)
+        return decode_jwt(t)
+
+    monkeypatch.setattr(bearer, "decode_jwt", slow_decode)
+
+    async def burst():
+        calls = [bearer.authenticate(token) for _ in range(25)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(burst())
+
+    assert len(decoded) == 1
+    assert not bearer._in_flight
+    if valid:
+        assert all(permissions == {"finances": 1} for _, permissions in results)
+    else:
+        assert all(isinstance(e, TokenValidationException) for e in results)
+        assert len({id(e) for e in results}) == 25
+
+    asyncio.run(burst())
+    assert len(decoded) == 2
+
+
+def test_process_executor():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    token = encode_jwt_token(
+        {"permissions": {"it": 2}}, private_key, 1, algorithm="ES256"
+    )
+
+    with ProcessPoolExecutor(1) as pool:
+        bearer = HeaderTokenBearer(
+            "Authorization", pem, "permissions", "ES256", executor=pool
+        )
+        _, permissions = asyncio.run(bearer.authenticate(token))
+        assert permissions == {"it": 2}
+
+        with pytest.raises(TokenValidationException, match="signature is invalid"):
+            asyncio.run(bearer.authenticate(token[:-2]))
+
+
+def test_process_executor_requires_picklable_key():
+    with ProcessPoolExecutor(1) as pool, pytest.raises(ValueError):
+        HeaderTokenBearer(
+            "Authorization", StaticKeyManager(SECRET_KEY), "permissions", executor=pool
+        )
+
+
+def test_saturated_executor_fails_fast(thread_pool):
+    keys = BlockingKeyManager()
+    bearer = HeaderTokenBearer(
+        "Authorization",
+        keys,
+        "permissions",
+        executor=thread_pool,
+        max_pending=1,
+        cache=TokenCache(),
+    )
+    token = encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+    other_token = encode_jwt_token({"permissions": {"it": 1}}, SECRET_KEY, 1)
+
+    async def scenario():
+        in_flight = asyncio.ensure_future(bearer.authenticate(token))
+        await asyncio.to_thread(keys.started.acquire)
+
+        with pytest.raises(VerificationOverloadedException) as overloaded:
+            await bearer.authenticate(other_token)
+        assert overloaded.value.status_code == 503
+        assert overloaded.value.headers["Retry-After"] == "1"
+
+        keys.release.set()
+        await in_flight
+        # Cache hits never reach the executor, and the slot is free again.
+        await bearer.authenticate(token)
+        assert bearer.cache.hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_rejections_sharing_the_overload_status_are_cached(thread_pool):
+    bearer = HeaderTokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        executor=thread_pool,
+        max_pending=4,
+        overload_status_code=403,
+        rejected_cache=RejectedTokenCache(),
+    )
+    token = encode_jwt_token({"permissions": {}}, SECRET_KEY, 1)[:-2]
+
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        asyncio.run(bearer.authenticate(token))
+    assert len(bearer.rejected_cache) == 1
+
+
+def test_rejected_tokens_skip_decoding(monkeypatch):
+    bearer = HeaderTokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        rejected_cache=RejectedTokenCache(ttl=60),
+    )
+    expired = encode_jwt_token({"permissions": {}}, SECRET_KEY, -1)
+    with pytest.raises(TokenValidationException, match="has expired"):
+        bearer.verify(expired)
+
+    def decode_jwt(token):
+        raise AssertionError("rejected tokens must not be decoded again")
+
+    monkeypatch.setattr(bearer, "decode_jwt", decode_jwt)
+    for _ in range(2):
+        with pytest.raises(TokenValidationException, match="has expired"):
+            asyncio.run(bearer.authenticate(expired))
+    assert bearer.rejected_cache.hits == 2
+    assert len(bearer.rejected_cache) == 1
+
+
+def test_rejected_token_cache_expiry_and_size():
+    cache = RejectedTokenCache(maxsize=2, ttl=60)
+    error = TokenValidationException(403, "The token signature is invalid.")
+    for token in ("a", "b", "c"):
+        cache.put(token, error)
+    assert cache.get("a") is None
+    assert cache.get("c").detail == "The token signature is invalid."
+
+    cache = RejectedTokenCache(ttl=0)
+    cache.put("a", error)
+    assert cache.get("a") is None
+
+
+def test_rejected_token_cache_is_scoped_to_bearer_configuration():
+    cache = RejectedTokenCache(ttl=60)
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", rejected_cache=cache
+    )
+    token = encode_jwt_token({"permissions": {}}, "B" * 64, 1)
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        bearer.verify(token)
+
+    same = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", rejected_cache=cache
+    )
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        asyncio.run(same.authenticate(token))
+    assert cache.hits == 1
+
+    with pytest.raises(ValueError, match="verifying tokens differently"):
+        HeaderTokenBearer(
+            "Authorization", "B" * 64, "permissions", rejected_cache=cache
+        )
+
+
+@pytest.mark.parametrize(
+    ("token", "reason"),
+    [
+        ("a" * 9000, "The token is too long."),
+        ("only.two", "The token signature is invalid."),
+        ("!!.payload.signature", "The token signature is invalid."),
+        # {"alg": "none"}
+        ("eyJhbGciOiJub25lIn0.e30.", "The token is invalid."),
+    ],
+    ids=["too-long", "segments", "header", "algorithm"],
+)
+def test_structural_prechecks(monkeypatch, token, reason):
+    bearer = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions")
+    monkeypatch.setattr(bearer, "decode_jwt", pytest.fail)
+
+    with pytest.raises(TokenValidationException) as rejected:
+        bearer.verify(token)
+    assert rejected.value.detail == reason
+
+
+def _connection(headers=(), query_string=b"", scope_type="http", subprotocols=()):
+    return HTTPConnection(
+        {
+            "type": scope_type,
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+            "query_string": query_string,
+            "subprotocols": list(subprotocols),
+        }
+    )
+
+
+def test_sources_are_probed_in_order():
+    bearer = TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        sources=["query", "header", "cookie", "websocket"],
+    )
+    connection = _connection(
+        [("Authorization", "Bearer from-header"), ("Cookie", "Authorization=c")],
+        query_string=b"Authorization=from-query",
+    )
+
+    assert bearer.find_token(connection) == ("query", "from-query")
+    assert bearer.find_token(_connection([("Cookie", "Authorization=c")])) == (
+        "cookie",
+        "c",
+    )
+    assert bearer.find_token(_connection()) is None
+
+    websocket = _connection(
+        scope_type="websocket", subprotocols=["chat", "Authorization", "from-ws"]
+    )
+    assert bearer.find_token(websocket) == ("websocket", "from-ws")
+
+
+@pytest.mark.parametrize(
+    "cookie",
+    [
+        "a=1; Authorization=tok; b=2",
+        "XAuthorization=no; a=Authorization; Authorization = tok ",
+        "Authorization=old; Authorization=tok",
+        'theme=dark; Authorization="tok"',
+        "Authorization=tok",
+    ],
+)
+def test_cookie_extraction_matches_starlette(cookie):
+    bearer = TokenBearer("Authorization", SECRET_KEY, "permissions")
+    connection = _connection([("Cookie", cookie)])
+
+    assert connection.cookies["Authorization"] == "tok"
+    assert bearer.find_token(connection) == ("cookie", "tok")
+    assert bearer.find_token(_connection([("Cookie", "XAuthorization=no")])) is None
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("Bearer tok", "tok"),
+        ("bearer  tok", "tok"),
+        ("BEARER tok", "tok"),
+        ("tok", "tok"),
+        ("tokbearer x", "tokbearer x"),
+    ],
+)
+def test_header_extraction(value, expected):
+    bearer = HeaderTokenBearer("authorization", SECRET_KEY, "permissions")
+    connection = _connection([("X-Other", "Bearer no"), ("Authorization", value)])
+
+    assert bearer.split_token_str(bearer.find_token(connection)[1]) == expected
+
+
+def test_invalid_cookie_does_not_fall_back_to_header(monkeypatch):
+    bearer = TokenBearer("Authorization", SECRET_KEY, "permissions")
+    token = encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+    decoded = []
+    decode_jwt = bearer.decode_jwt
+    monkeypatch.setattr(
+        bearer, "decode_jwt", lambda t: decoded.append(t) or decode_jwt(t)
+    )
+
+    connection = _connection(
+        [("Cookie", f"Authorization={token[:-2]}"), ("Authorization", token)]
+    )
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        asyncio.run(bearer(connection))
+    assert decoded == [token[:-2]]
+
+    _, permissions = asyncio.run(bearer(_connection([("Authorization", token)])))
+    assert permissions == {"finances": 1}
+
+
+def test_missing_token_message():
+    bearer = TokenBearer("Authorization", SECRET_KEY, "permissions")
+    with pytest.raises(TokenValidationException) as missing:
+        asyncio.run(bearer(_connection()))
+    assert missing.value.detail == (
+        "Token not found on request cookies or headers using key 'Authorization'"
+    )
+
+
+def test_unknown_source():
+    with pytest.raises(ValueError, match="Invalid token sources"):
+        TokenBearer("Authorization", SECRET_KEY, "permissions", sources=["body"])
+
+
+def test_websocket_authentication():
+    bearer = TokenBearer(
+        "Authorization", SECRET_KEY, "permissions", sources=["websocket"]
+    )
+    rule = AccessRule("finances", READ, bearer)
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket, claims=rule) -> None:
+        await websocket.accept(subprotocol="Authorization")
+        await websocket.send_json(claims["permissions"])
+        await websocket.close()
+
+    token = encode_jwt_token({"permissions": {"finances": 0}}, SECRET_KEY, 1)
+    with TestClient(app).websocket_connect(
+        "/ws", subprotocols=["Authorization", token]
+    ) as websocket:
+        assert websocket.receive_json() == {"finances": 0}
+
+
+def test_packed_permissions():
+    index = AreaIndex([f"area_{i}" for i in range(200)])
+    permissions = {f"area_{i}": i % 3 for i in range(200)}
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", area_index=index
+    )
+    token = encode_jwt_token(
+        {"permissions": permissions}, SECRET_KEY, 1, area_index=index
+    )
+    minted = TokenMinter(SECRET_KEY, area_index=index).mint(
+        {"permissions": permissions}
+    )
+
+    assert (
+        len(token)
+        < len(encode_jwt_token({"permissions": permissions}, SECRET_KEY, 1)) / 4
+    )
+    assert bearer.verify(token)[1] == permissions
+    assert bearer.verify(minted)[1] == permissions
+
+    unconfigured = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions")
+    with pytest.raises(TokenValidationException, match="need an area_index"):
+        unconfigured.verify(token)
+
+    other = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", area_index=AreaIndex(["it"])
+    )
+    with pytest.raises(TokenValidationException, match="permissions are invalid"):
+        other.verify(token)
+
+    with pytest.raises(ValueError, match="no 'permissions' to pack"):
+        encode_jwt_token({"sub": "john"}, SECRET_KEY, 1, area_index=index)
+    with pytest.raises(ValueError, match="no 'permissions' to pack"):
+        TokenMinter(SECRET_KEY, area_index=index).mint({"sub": "john"})
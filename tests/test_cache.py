@@ -0,0 +1,206 @@
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+import pytest
+
+from missil import HeaderTokenBearer
+from missil import SharedTokenCache
+from missil import TokenCache
+from missil import encode_jwt_token
+from missil.exceptions import TokenValidationException
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
+@pytest.fixture
+def token():
+    return encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+
+
+@pytest.fixture
+def bearer():
+    return HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", cache=TokenCache(maxsize=2)
+    )
+
+
+def test_verify_populates_cache(bearer, token):
+    claims, permissions = bearer.verify(token)
+    assert permissions == {"finances": 1}
+    assert bearer.cache.misses == 1
+
+    cached_claims, cached_permissions = bearer.verify(token)
+    assert cached_claims is claims
+    assert cached_permissions is permissions
+    assert bearer.cache.hits == 1
+    assert bearer.cache.hit_ratio == 0.5
+
+
+def test_invalid_tokens_are_not_cached(bearer):
+    with pytest.raises(TokenValidationException):
+        bearer.verify("not.a.token")
+    assert len(bearer.cache) == 0
+
+
+def test_lru_eviction():
+    cache = TokenCache(maxsize=2)
+    cache.put("a", {}, {})
+    cache.put("b", {}, {})
+    assert cache.get("a") is not None
+    cache.put("c", {}, {})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_expired_entries_are_evicted():
+    cache = TokenCache()
+    cache.put("expired", {"exp": int(time.time()) - 1}, {})
+    cache.put("immature", {"nbf": int(time.time()) + 60}, {})
+    assert cache.get("expired") is None
+    assert cache.get("immature") is None
+    assert len(cache) == 0
+
+
+def test_ttl_caps_entry_lifetime():
+    cache = TokenCache(ttl=0)
+    cache.put("token", {"exp": int(time.time()) + 3600}, {})
+    assert cache.get("token") is None
+
+
+def test_clear_resets_counters():
+    cache = TokenCache()
+    cache.put("token", {}, {})
+    cache.get("token")
+    cache.get("missing")
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_cache_is_scoped_to_bearer_configuration(token):
+    cache = TokenCache()
+    bearer = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions", cache=cache)
+    bearer.verify(token)
+
+    same = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions", cache=cache)
+    assert same.verify(token)[1] == {"finances": 1}
+    assert cache.hits == 1
+
+    with pytest.raises(ValueError, match="verifying tokens differently"):
+        HeaderTokenBearer("Authorization", "B" * 64, "permissions", cache=cache)
+    with pytest.raises(ValueError, match="verifying tokens differently"):
+        HeaderTokenBearer("Authorization", SECRET_KEY, "roles", cache=cache)
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        TokenCache(maxsize=0)
+
+
+def _verify_in_worker(path, token):
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", cache=SharedTokenCache(path)
+    )
+    return bearer.verify(token)[1]
+
+
+def test_shared_cache_across_processes(tmp_path, token, monkeypatch):
+    path = tmp_path / "tokens"
+    with ProcessPoolExecutor(1) as pool:
+        assert pool.submit(_verify_in_worker, path, token).result() == {"finances": 1}
+
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", cache=SharedTokenCache(path)
+    )
+    monkeypatch.setattr(bearer, "decode_jwt", None)  # must not be called
+    claims, permissions = bearer.verify(token)
+    assert permissions == {"finances": 1}
+    assert claims["permissions"] == {"finances": 1}
+    assert bearer.cache.hits == 1
+    assert len(bearer.cache) == 1
+
+    bearer.cache.invalidate(token)
+    assert bearer.cache.get(token) is None
+
+
+def test_shared_cache_eviction_prefers_expired_entries(tmp_path):
+    cache = SharedTokenCache(tmp_path / "tokens", maxsize=4, slot_size=128)
+    now = time.time()
+    cache.put("expired", {"exp": now - 1}, {})
+    for i in range(3):
+        cache.put(f"token{i}", {"exp": now + 60 + i}, {})
+
+    cache.put("new", {"exp": now + 600}, {})
+    assert [cache.get(f"token{i}") is not None for i in range(3)] == [True] * 3
+    assert cache.get("new").claims == {"exp": now + 600}
+    assert cache.get("expired") is None
+
+    cache.put("newer", {"exp": now + 600}, {})
+    assert cache.get("token0") is None  # closest to expiry
+
+    cache.put("large", {"blob": "x" * 200}, {})
+    assert cache.get("large") is None
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_shared_cache_publishes_whole_slots(tmp_path, monkeypatch):
+    import missil.cache
+
+    cache = SharedTokenCache(tmp_path / "tokens", maxsize=1, slot_size=128)
+    sequence = missil.cache._SEQUENCE
+    published = []
+
+    class Recorder:
+        unpack_from = sequence.unpack_from
+
+        def pack_into(self, buffer, offset, value):
+            # Readers only trust even sequences: the slot must be complete.
+            header = missil.cache._SLOT.unpack_from(buffer, offset)
+            published.append((value, header[0], header[3:], cache.get("token")))
+            sequence.pack_into(buffer, offset, value)
+
+    monkeypatch.setattr(missil.cache, "_SEQUENCE", Recorder())
+    cache.put("token", {"exp": 2**32}, {})
+
+    assert published == [(2, 1, (float("-inf"), 2**32), None)]
+    assert cache.get("token").expires_at == 2**32
+
+
+def test_shared_cache_layout_must_match(tmp_path):
+    SharedTokenCache(tmp_path / "tokens", maxsize=4)
+    with pytest.raises(ValueError, match="different cache layout"):
+        SharedTokenCache(tmp_path / "tokens", maxsize=8)
+
+
+def test_shared_cache_is_scoped_to_bearer_configuration(tmp_path, token):
+    path = tmp_path / "tokens"
+    trusted = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "permissions", cache=SharedTokenCache(path)
+    )
+    trusted.verify(token)
+
+    other_key = HeaderTokenBearer(
+        "Authorization", "another-secret", "permissions", cache=SharedTokenCache(path)
+    )
+    with pytest.raises(TokenValidationException):
+        other_key.verify(token)
+    assert other_key.cache.hits == 0
+
+    other_algorithms = HeaderTokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        ["HS256", "HS512"],
+        cache=SharedTokenCache(path),
+    )
+    other_algorithms.verify(token)
+    assert other_algorithms.cache.hits == 0
+
+    with pytest.raises(ValueError, match="one cache per bearer"):
+        HeaderTokenBearer(
+            "Authorization", "another-secret", "permissions", cache=trusted.cache
+        )
@@ -1,11 +1,13 @@
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+import json
 import logging
 
 import jwt
 import pytest
 
+from missil import __main__ as cli
 from missil import codec as jwt_utilities
 from missil.exceptions import TokenValidationException
 from tests.utils import ignore_warnings
@@ -192,3 +194,74 @@ def test_decode_jwt_invalid_token(secret_key, encoded_invalid_jwt_token):
         TokenValidationException, match="The token signature is invalid."
     ):
         jwt_utilities.decode_jwt_token(encoded_invalid_jwt_token, secret_key)
+
+
+@ignore_warnings
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_decode_jwt_tokens_keeps_order(
+    executor, claims, secret_key, encoded_jwt_token, encoded_expired_jwt_token
+):
+    tokens = [encoded_jwt_token, encoded_expired_jwt_token, "garbage"] * 5
+    results = list(
+        jwt_utilities.decode_jwt_tokens(
+            tokens, secret_key, executor=executor, max_workers=2, chunksize=2
+        )
+    )
+
+    assert len(results) == len(tokens)
+    for valid, expired, garbage in zip(*[iter(results)] * 3, strict=True):
+        del valid["exp"]
+        assert valid == claims
+        assert isinstance(expired, TokenValidationException)
+        assert expired.detail == "The token signature has expired."
+        assert isinstance(garbage, TokenValidationException)
+        assert garbage.detail == "The token signature is invalid."
+
+
+@ignore_warnings
+def test_verify_cli(tmp_path, capsys, secret_key, encoded_jwt_token):
+    tokens = tmp_path / "tokens.txt"
+    tokens.write_text(f"Bearer {encoded_jwt_token}\n\ngarbage\n")
+
+    status = cli.main(
+        ["verify", "--key", secret_key, "--threads", "--strict", str(tokens)]
+    )
+    verdicts = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert status == 1
+    assert verdicts[0]["line"] == 1
+    assert verdicts[0]["valid"] is True
+    assert verdicts[0]["claims"]["username"] == "johndoe"
+    assert verdicts[1] == {
+        "line": 3,
+        "valid": False,
+        "status_code": 403,
+        "reason": "The token signature is invalid.",
+    }
+
+
+def test_verify_cli_forgets_written_lines(tmp_path, capsys, monkeypatch, secret_key):
+    tokens = tmp_path / "tokens.txt"
+    tokens.write_text("garbage\n\n" * 1000)
+    queues = []
+
+    class Lines(cli.deque):
+        def __init__(self):
+            super().__init__()
+            self.longest = 0
+            queues.append(self)
+
+        def append(self, line):
+            super().append(line)
+            self.longest = max(self.longest, len(self))
+
+    monkeypatch.setattr(cli, "deque", Lines)
+    args = ["--threads", "--workers", "2", "--chunksize", "4", str(tokens)]
+    assert cli.main(["verify", "--key", secret_key, *args]) == 0
+
+    verdicts = capsys.readouterr().out.splitlines()
+    assert [json.loads(verdict)["line"] for verdict in verdicts] == list(
+        range(1, 2000, 2)
+    )
+    assert not queues[0]
+    assert queues[0].longest < 100
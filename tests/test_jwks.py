@@ -0,0 +1,160 @@
+import json
+import time
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+import jwt
+from jwt.algorithms import RSAAlgorithm
+import pytest
+
+from missil import HeaderTokenBearer
+from missil import encode_jwt_token
+from missil.exceptions import TokenValidationException
+from missil.jwks import JWKSKeyManager
+
+
+@pytest.fixture(scope="module")
+def private_keys():
+    return {kid: rsa.generate_private_key(65537, 2048) for kid in ("k1", "k2")}
+
+
+def _jwk(kid, private_key):
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return jwk
+
+
+class FakeJWKSKeyManager(JWKSKeyManager):
+    """Serve the key set from memory instead of over HTTP."""
+
+    def __init__(self, documents, **kwargs):  # noqa: D107
+        super().__init__("https://idp.test/jwks.json", **kwargs)
+        self.documents = documents
+        self.fetches = 0
+
+    def fetch_jwks(self):  # noqa: D102
+        self.fetches += 1
+        return self.documents[min(self.fetches, len(self.documents)) - 1]
+
+
+def _token(private_keys, kid) -> str:
+    return jwt.encode(
+        {"permissions": {"finances": 1}, "exp": 2**32},
+        private_keys[kid],
+        algorithm="RS256",
+        headers={"kid": kid},
+    )
+
+
+def test_selects_key_by_kid(private_keys):
+    keys = FakeJWKSKeyManager(
+        [{"keys": [_jwk(kid, key) for kid, key in private_keys.items()]}]
+    )
+    keys.refresh()
+    bearer = HeaderTokenBearer("Authorization", keys, "permissions", "RS256")
+
+    for kid in private_keys:
+        _, permissions = bearer.verify(_token(private_keys, kid))
+        assert permissions == {"finances": 1}
+
+    assert keys.fetches == 1
+    assert sorted(keys.kids) == ["k1", "k2"]
+
+
+def test_unknown_kid_triggers_background_refresh(private_keys):
+    keys = FakeJWKSKeyManager(
+        [
+            {"keys": [_jwk("k1", private_keys["k1"])]},
+            {"keys": [_jwk(kid, key) for kid, key in private_keys.items()]},
+        ],
+        min_refresh_interval=0,
+    )
+    keys.start()
+    try:
+        # Rejected at once, the fetch happens in the refresh thread.
+        with pytest.raises(TokenValidationException, match="signing key is unknown"):
+            keys.get_key(_token(private_keys, "k2"))
+
+        deadline = time.monotonic() + 5
+        while "k2" not in keys.kids and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert keys.get_key(_token(private_keys, "k2")) is not None
+    finally:
+        keys.stop()
+    assert keys.fetches == 2
+
+
+def test_unknown_kid_refresh_is_rate_limited(private_keys):
+    keys = FakeJWKSKeyManager([{"keys": [_jwk("k1", private_keys["k1"])]}])
+    keys.start()
+    try:
+        for _ in range(3):
+            with pytest.raises(
+                TokenValidationException, match="signing key is unknown"
+            ):
+                keys.get_key(_token(private_keys, "k2"))
+        time.sleep(0.05)
+    finally:
+        keys.stop()
+    assert keys.fetches == 1
+
+
+def test_keys_must_be_loaded_before_use(private_keys):
+    keys = FakeJWKSKeyManager([{"keys": [_jwk("k1", private_keys["k1"])]}])
+    with pytest.raises(RuntimeError, match="start"):
+        keys.get_key(_token(private_keys, "k1"))
+    assert keys.fetches == 0
+
+
+def test_malformed_token_header():
+    keys = FakeJWKSKeyManager([{"keys": []}])
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        keys.get_key("garbage")
+
+
+def test_tokens_signed_with_unlisted_key_are_rejected(private_keys):
+    keys = FakeJWKSKeyManager([{"keys": [_jwk("k1", private_keys["k2"])]}])
+    keys.refresh()
+    bearer = HeaderTokenBearer("Authorization", keys, "permissions", "RS256")
+    token = encode_jwt_token({}, private_keys["k1"], 1, algorithm="RS256")
+
+    # No kid in the header falls back to the only key in the set.
+    with pytest.raises(TokenValidationException, match="signature is invalid"):
+        bearer.verify(token)
+
+
+def test_malformed_documents_keep_the_refresh_thread_alive(private_keys):
+    keys = FakeJWKSKeyManager(
+        [
+            {"keys": [_jwk("k1", private_keys["k1"])]},
+            [1, 2],
+            {"keys": [1, "k2", _jwk("k2", private_keys["k2"])]},
+        ],
+        refresh_interval=0.01,
+    )
+    keys.start()
+    try:
+        deadline = time.monotonic() + 5
+        while "k2" not in keys.kids and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert keys.kids == ["k2"]
+        assert keys._thread.is_alive()
+    finally:
+        keys.stop()
+
+    keys.documents = [[1, 2]]
+    keys.fetches = 0
+    with pytest.raises(ValueError, match="not an object"):
+        keys.refresh()
+    assert keys.kids == ["k2"]
+
+
+def test_background_refresh(private_keys):
+    keys = FakeJWKSKeyManager(
+        [{"keys": [_jwk("k1", private_keys["k1"])]}], refresh_interval=0.01
+    )
+    keys.start()
+    try:
+        assert keys.kids == ["k1"]
+    finally:
+        keys.stop()
+    assert keys.fetches >= 1
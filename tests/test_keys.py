@@ -0,0 +1,72 @@
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import rsa
+import jwt
+import pytest
+
+from missil import HeaderTokenBearer
+from missil import StaticKeyManager
+from missil import encode_jwt_token
+from missil import load_key
+from missil import load_key_file
+
+
+def _pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+@pytest.fixture(
+    scope="module",
+    params=[
+        ("RS256", lambda: rsa.generate_private_key(65537, 2048)),
+        ("ES256", lambda: ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate),
+    ],
+    ids=lambda param: param[0],
+)
+def keypair(request):
+    algorithm, generate = request.param
+    return algorithm, _pem(generate())
+
+
+def test_load_key_parses_pem(keypair):
+    algorithm, pem = keypair
+    key = load_key(pem, algorithm)
+    assert not isinstance(key, (str, bytes))
+    assert load_key(key, algorithm) is key
+
+
+def test_load_key_unwraps_pyjwk():
+    jwk = jwt.PyJWK({"kty": "oct", "k": "c2VjcmV0", "alg": "HS256"})
+    assert load_key(jwk) == b"secret"
+
+
+def test_static_key_manager_uses_public_half(keypair):
+    algorithm, pem = keypair
+    manager = StaticKeyManager(pem, algorithm)
+    assert not hasattr(manager.key, "public_key")
+
+
+def test_asymmetric_round_trip(keypair, tmp_path):
+    algorithm, pem = keypair
+    path = tmp_path / "key.pem"
+    path.write_bytes(pem)
+
+    signing_key = load_key_file(path, algorithm)
+    token = encode_jwt_token(
+        {"permissions": {"finances": 1}}, signing_key, 1, algorithm=algorithm
+    )
+
+    bearer = HeaderTokenBearer(
+        "Authorization",
+        StaticKeyManager.from_file(path, algorithm),
+        "permissions",
+        algorithm,
+    )
+    _, permissions = bearer.verify(token)
+    assert permissions == {"finances": 1}
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from missil import READ
+from missil import WRITE
+from missil import AccessRule
+from missil import InMemoryMetrics
+from missil import Role
+from missil import SharedTokenCache
+from missil import TokenBearer
+from missil import TokenCache
+from missil import encode_jwt_token
+from missil import render_prometheus
+from missil.exceptions import PermissionDeniedException
+from missil.exceptions import TokenValidationException
+from missil.metrics import ACCESS_DECISIONS
+from missil.metrics import CACHE_LOOKUPS
+from missil.metrics import DECODE_SECONDS
+from missil.metrics import TOKEN_SOURCES
+from missil.permissions import AreaIndex
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
+@pytest.fixture
+def metrics():
+    return InMemoryMetrics()
+
+
+@pytest.fixture
+def bearer(metrics):
+    return TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        cache=TokenCache(),
+        metrics=metrics,
+    )
+
+
+def _request(headers):
+    raw = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_bearer_metrics(metrics, bearer):
+    token = encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+
+    asyncio.run(bearer(_request({"Authorization": f"Bearer {token}"})))
+    asyncio.run(bearer(_request({"Cookie": f"Authorization={token}"})))
+    with pytest.raises(TokenValidationException):
+        bearer.verify(token[:-2])
+
+    assert metrics.counter(TOKEN_SOURCES, source="header") == 1
+    assert metrics.counter(TOKEN_SOURCES, source="cookie") == 1
+    assert metrics.counter(CACHE_LOOKUPS, cache="token", result="hit") == 1
+    assert metrics.cache_hit_ratio("token") == pytest.approx(1 / 3)
+
+    valid = metrics.histograms[
+        (DECODE_SECONDS, (("algorithm", "HS256"), ("outcome", "valid")))
+    ]
+    rejected = metrics.histograms[
+        (DECODE_SECONDS, (("algorithm", "HS256"), ("outcome", "rejected")))
+    ]
+    assert (valid.count, rejected.count) == (1, 1)
+
+
+def test_shared_cache_lookups_are_labelled(metrics, tmp_path):
+    bearer = TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        cache=SharedTokenCache(tmp_path / "tokens"),
+        metrics=metrics,
+    )
+    token = encode_jwt_token({"permissions": {"finances": 1}}, SECRET_KEY, 1)
+    bearer.verify(token)
+    bearer.verify(token)
+
+    assert metrics.cache_hit_ratio("shared") == pytest.approx(1 / 2)
+    assert metrics.counter(CACHE_LOOKUPS, cache="token") == 0
+
+
+@pytest.mark.parametrize("indexed", [False, True], ids=["dict", "indexed"])
+def test_rule_and_role_decisions(metrics, bearer, indexed):
+    index = AreaIndex(["finances", "it"]) if indexed else None
+    read = AccessRule("finances", READ, bearer, area_index=index)
+    write = AccessRule("it", WRITE, bearer, area_index=index)
+    role = Role(read, write)
+    permissions = {"finances": 1, "it": 0}
+    claims = ({}, index.vectorize(permissions) if indexed else permissions)
+
+    asyncio.run(read.dependency(claims))
+    with pytest.raises(PermissionDeniedException):
+        asyncio.run(write.dependency(claims))
+    with pytest.raises(PermissionDeniedException):
+        asyncio.run(role.dependency(_bearer_0=claims))
+
+    assert metrics.counter(ACCESS_DECISIONS, area="finances", level="READ") == 2
+    assert metrics.counter(ACCESS_DECISIONS, area="it", decision="denied") == 2
+    assert metrics.counter(ACCESS_DECISIONS, decision="granted") == 2
+
+
+def test_rules_without_metrics(bearer):
+    rule = AccessRule("finances", READ, TokenBearer("a", SECRET_KEY, "permissions"))
+    assert rule.metrics is None
+    assert AccessRule("finances", READ, bearer).metrics is bearer.metrics
+
+
+def test_render_prometheus(metrics):
+    metrics.increment(ACCESS_DECISIONS, (("area", 'fi"n'), ("decision", "denied")))
+    metrics.observe(DECODE_SECONDS, (("algorithm", "RS256"),), 0.0003)
+    metrics.observe(DECODE_SECONDS, (("algorithm", "RS256"),), 5.0)
+
+    text = render_prometheus(metrics)
+
+    assert "# TYPE missil_access_decisions_total counter" in text
+    assert 'missil_access_decisions_total{area="fi\\"n",decision="denied"} 1' in text
+    assert "# TYPE missil_token_decode_seconds histogram" in text
+    assert 'missil_token_decode_seconds_bucket{algorithm="RS256",le="0.0001"} 0' in text
+    assert 'missil_token_decode_seconds_bucket{algorithm="RS256",le="0.0005"} 1' in text
+    assert 'missil_token_decode_seconds_bucket{algorithm="RS256",le="+Inf"} 2' in text
+    assert 'missil_token_decode_seconds_count{algorithm="RS256"} 2' in text
+    assert text.endswith("\n")
@@ -0,0 +1,126 @@
+import re
+
+from fastapi import FastAPI
+from fastapi import Request
+import pytest
+from starlette.testclient import TestClient
+
+import missil
+from missil import AuthenticationMiddleware
+from missil import HeaderTokenBearer
+from missil import ProtectedRouter
+from missil import Role
+from missil import ServerTimingMiddleware
+from missil import encode_jwt_token
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
+class CountingBearer(HeaderTokenBearer):
+    """Header bearer counting how many tokens it decodes."""
+
+    decodes = 0
+
+    def decode_jwt(self, token):  # noqa: D102
+        self.decodes += 1
+        return super().decode_jwt(token)
+
+
+@pytest.fixture
+def bearer():
+    return CountingBearer("Authorization", SECRET_KEY, "permissions")
+
+
+@pytest.fixture
+def client(bearer):
+    class AppAreas(missil.AreasBase):
+        finances: missil.Area
+        it: missil.Area
+
+    areas = AppAreas(bearer)
+    router = ProtectedRouter(rules=[areas.finances.READ])
+
+    @router.get(
+        "/protected",
+        dependencies=[areas.finances.WRITE, Role(areas.finances.READ, areas.it.READ)],
+    )
+    def protected() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    app = FastAPI()
+    app.include_router(router)
+
+    @app.get("/public")
+    def public() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    app.add_middleware(AuthenticationMiddleware, bearer=bearer)
+    return TestClient(app)
+
+
+def test_decodes_once_per_request(client, bearer):
+    token = encode_jwt_token(
+        {"permissions": {"finances": missil.WRITE, "it": missil.READ}}, SECRET_KEY, 1
+    )
+    response = client.get("/protected", headers={"Authorization": token})
+    assert response.status_code == 200
+    assert bearer.decodes == 1
+
+
+def test_public_routes_need_no_token(client):
+    assert client.get("/public").status_code == 200
+
+
+def test_errors_are_raised_by_dependencies(client):
+    response = client.get("/protected")
+    assert response.status_code == 403
+    assert response.json() == {
+        "detail": "Token not found on request headers using key 'Authorization'"
+    }
+
+    response = client.get("/protected", headers={"Authorization": "Bearer bad"})
+    assert response.status_code == 403
+    assert response.json() == {"detail": "The token signature is invalid."}
+
+
+def _timed_app(bearer, **kwargs):
+    areas_rule = missil.AccessRule("finances", missil.READ, bearer)
+    app = FastAPI()
+
+    @app.get("/timed", dependencies=[areas_rule])
+    def timed(request: Request) -> dict[str, list[str]]:
+        return {"stages": list(request.state.missil_timings.stages)}
+
+    app.add_middleware(ServerTimingMiddleware, **kwargs)
+    return app
+
+
+def test_server_timing_header(bearer):
+    client = TestClient(_timed_app(bearer))
+    token = encode_jwt_token({"permissions": {"finances": 0}}, SECRET_KEY, 1)
+
+    response = client.get("/timed", headers={"Authorization": token})
+
+    assert response.json() == {"stages": ["extract", "decode", "check"]}
+    assert re.fullmatch(
+        r"missil-extract;dur=[\d.]+, missil-decode;dur=[\d.]+, "
+        r"missil-check;dur=[\d.]+",
+        response.headers["server-timing"],
+    )
+
+
+def test_server_timing_callback(bearer):
+    collected = []
+    app = _timed_app(
+        bearer,
+        header=False,
+        callback=lambda request, timings: collected.append(timings),
+    )
+
+    response = TestClient(app).get("/timed")
+
+    assert response.status_code == 403
+    assert "server-timing" not in response.headers
+    assert list(collected[0].stages) == ["extract"]
+    assert collected[0].total >= 0
@@ -0,0 +1,87 @@
+from datetime import timedelta
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+import jwt as pyjwt
+import pytest
+
+from missil import TokenMinter
+from missil import decode_jwt_token
+from missil import encode_jwt_token
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
+def test_minted_tokens_match_pyjwt():
+    minter = TokenMinter(SECRET_KEY, lifetime=90, issued_at=False, clock=lambda: 1000)
+    claims = {"sub": "john", "permissions": {"finances": 1}}
+
+    token = minter.mint(claims)
+
+    assert token == pyjwt.encode({**claims, "exp": 1090}, SECRET_KEY, "HS256")
+    assert minter.mint(claims, lifetime=30).count(".") == 2
+    assert pyjwt.get_unverified_header(token) == {"alg": "HS256", "typ": "JWT"}
+
+
+def test_default_claims():
+    minter = TokenMinter(
+        SECRET_KEY,
+        lifetime=timedelta(minutes=15),
+        issuer="https://auth.example.com",
+        audience="api",
+        jwt_id=True,
+        headers={"kid": "2024"},
+    )
+    now = int(time.time())
+
+    token = minter.mint({"sub": "john"})
+    claims = pyjwt.decode(token, SECRET_KEY, ["HS256"], audience="api")
+
+    assert claims["iss"] == "https://auth.example.com"
+    assert now <= claims["iat"] <= now + 1
+    assert claims["exp"] == claims["iat"] + 900
+    assert len(claims["jti"]) == 32
+    assert (
+        claims["jti"]
+        != pyjwt.decode(minter.mint({}), SECRET_KEY, ["HS256"], audience="api")["jti"]
+    )
+    assert pyjwt.get_unverified_header(token)["kid"] == "2024"
+    assert minter.mint({"jti": "fixed", "aud": "api"}).count(".") == 2
+
+
+def test_invalid_lifetime():
+    with pytest.raises(ValueError, match="lifetime"):
+        TokenMinter(SECRET_KEY, lifetime=0)
+
+
+@pytest.mark.parametrize("executor", [None, "thread", "process"])
+def test_mint_many(executor):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    minter = TokenMinter(pem, "ES256")
+    claim_sets = ({"sub": str(i)} for i in range(50))
+
+    tokens = list(minter.mint_many(claim_sets, executor=executor, chunksize=8))
+
+    public_key = private_key.public_key()
+    assert [decode_jwt_token(t, public_key, "ES256")["sub"] for t in tokens] == [
+        str(i) for i in range(50)
+    ]
+
+
+def test_process_pool_requires_picklable_key():
+    minter = TokenMinter(ec.generate_private_key(ec.SECP256R1()), "ES256")
+    with pytest.raises(ValueError, match="str or bytes key"):
+        next(minter.mint_many([{}], executor="process"))
+
+
+def test_encode_with_timedelta():
+    token = encode_jwt_token({}, SECRET_KEY, timedelta(seconds=30))
+    claims = decode_jwt_token(token, SECRET_KEY)
+    assert claims["exp"] - time.time() <= 30
@@ -0,0 +1,128 @@
+from array import array
+
+import pytest
+
+from missil import READ
+from missil import PermissionDeniedException
+from missil.permissions import MISSING
+from missil.permissions import AreaIndex
+from missil.permissions import PermissionTrie
+from missil.rules import check_access
+from missil.rules import check_position
+
+
+def test_vectorize():
+    index = AreaIndex(["finances", "it", "other"])
+    vector = index.vectorize({"it": 2, "finances": 0, "unknown": 1})
+    assert vector == array("b", [0, 2, MISSING])
+    assert index.granted(vector, 1) == ["it"]
+
+
+def test_vectorize_clamps_levels():
+    index = AreaIndex(["finances", "it"])
+    assert index.vectorize({"finances": 1000, "it": -500}) == array("b", [127, -127])
+
+
+def test_negative_levels_are_not_missing():
+    index = AreaIndex(["finances"])
+    vector = index.vectorize({"finances": -1})
+
+    with pytest.raises(PermissionDeniedException) as indexed:
+        check_position(vector, 0, "finances", READ)
+    with pytest.raises(PermissionDeniedException) as by_name:
+        check_access({"finances": -1}, "finances", READ)
+    assert indexed.value.detail == by_name.value.detail
+    assert index.unpack(index.pack({"finances": -1})) == {"finances": -1}
+
+
+def test_duplicate_areas_rejected():
+    with pytest.raises(ValueError):
+        AreaIndex(["finances", "finances"])
+
+
+def test_unknown_area_position():
+    with pytest.raises(ValueError, match="'it' is not an indexed area."):
+        AreaIndex(["finances"]).position("it")
+
+
+def test_dependency_is_shared_per_bearer():
+    index = AreaIndex(["finances"])
+    bearer_a, bearer_b = object(), object()
+    assert index.dependency(bearer_a) is index.dependency(bearer_a)
+    assert index.dependency(bearer_a) is not index.dependency(bearer_b)
+
+
+@pytest.mark.parametrize(
+    "area, level",
+    [
+        ("finances.invoices", 1),
+        ("finances.invoices.eu", 1),
+        ("finances.payroll", 0),
+        ("finances.payroll.eu", 1),
+        ("finances", None),
+        ("it", 2),
+        ("it.servers", 0),
+        ("hr", 0),
+    ],
+)
+def test_permission_trie(area, level):
+    permissions = PermissionTrie(
+        {"*": 0, "finances.*": 1, "finances.payroll": 0, "it": 2}
+    )
+    assert permissions.resolve(area) == (0 if level is None else level)
+
+    scoped = PermissionTrie({"finances.*": 1, "finances.payroll": 0, "it": 2})
+    assert scoped.get(area) == (None if area in ("hr", "it.servers") else level)
+    assert (area in scoped) == (scoped.get(area) is not None)
+
+
+def test_permission_trie_is_a_dict():
+    grants = {"finances.*": 1, "it": 2}
+    permissions = PermissionTrie(grants)
+
+    assert permissions == grants
+    assert list(permissions) == ["finances.*", "it"]
+    assert permissions["finances.payroll"] == 1
+    with pytest.raises(KeyError):
+        permissions["hr"]
+    assert PermissionTrie.has_wildcards(grants)
+    assert not PermissionTrie.has_wildcards({"finances.payroll": 1})
+
+
+def test_vectorize_trie():
+    index = AreaIndex(["finances.payroll", "finances.invoices", "it"])
+    permissions = PermissionTrie({"finances.*": 1, "finances.payroll": 0})
+    assert index.vectorize(permissions) == array("b", [0, 1, MISSING])
+
+
+def test_pack_round_trip():
+    index = AreaIndex(["finances.payroll", "finances.invoices", "it"])
+    packed = index.pack(PermissionTrie({"finances.*": 1, "it": 2, "hr": 0}))
+
+    assert packed.startswith(f"p1.{index.fingerprint}.")
+    assert index.unpack(packed) == {
+        "finances.payroll": 1,
+        "finances.invoices": 1,
+        "it": 2,
+    }
+    assert index.unpack(index.pack({})) == {}
+
+
+@pytest.mark.parametrize(
+    "packed, reason",
+    [
+        ("p9.abc.AAA", "version"),
+        ("p1.wrongfingerp.AAAA", "other areas"),
+        ("garbage", "Malformed"),
+        ("p1.abc", "Malformed"),
+    ],
+)
+def test_unpack_rejects_foreign_values(packed, reason):
+    with pytest.raises(ValueError, match=reason):
+        AreaIndex(["finances", "it"]).unpack(packed)
+
+
+def test_unpack_rejects_other_orderings():
+    packed = AreaIndex(["finances", "it"]).pack({"finances": 1})
+    with pytest.raises(ValueError, match="other areas"):
+        AreaIndex(["it", "finances"]).unpack(packed)
@@ -0,0 +1,138 @@
+from fastapi import FastAPI
+from fastapi import Request
+import pytest
+from starlette.testclient import TestClient
+
+from missil import Area
+from missil import HeaderTokenBearer
+from missil import InMemoryMetrics
+from missil import PermissionDeniedException
+from missil import ProtectedRouter
+from missil import compile_policy
+from missil import encode_jwt_token
+from sample.main import SECRET_KEY
+from sample.main import app as sample_app
+from sample.main import areas
+
+
+def bearer_token() -> str:
+    return encode_jwt_token({"userPermissions": {"finances": 0}}, SECRET_KEY, 1)
+
+
+@pytest.fixture(scope="module")
+def policy():
+    return compile_policy(sample_app)
+
+
+def test_sample_matrix(policy):
+    rows = {row["path"]: row for row in policy.rows()}
+    assert rows["/"]["requirements"] == []
+    assert rows["/finances/read"]["requirements"] == ["finances:READ"]
+    assert rows["/finances/admin/router"]["requirements"] == ["finances:ADMIN"]
+    assert rows["/analyst-dashboard"]["requirements"] == ["finances:READ", "it:READ"]
+    assert rows["/user-profile"]["methods"] == ["GET"]
+    assert rows["/user-profile"]["requirements"] == ["it:READ"]
+
+
+def test_lookup(policy):
+    assert policy.lookup("/finances/write").rules == (areas.finances.WRITE,)
+    assert policy.lookup("/finances/write", "POST") is None
+    assert policy.lookup("/missing") is None
+
+
+def test_nested_routers():
+    inner = ProtectedRouter(prefix="/inner", rules=[areas.finances.WRITE])
+    outer = ProtectedRouter(prefix="/outer", rules=[areas.it.READ])
+
+    @inner.get("/report", dependencies=[areas.other.ADMIN])
+    def report() -> dict[str, str]:
+        return {}
+
+    outer.include_router(inner)
+    app = FastAPI()
+    app.include_router(outer)
+
+    policy = compile_policy(app)
+    route_policy = policy.lookup("/outer/inner/report")
+    assert set(route_policy.requirements) == {
+        ("it", 0),
+        ("finances", 1),
+        ("other", 2),
+    }
+
+
+def test_enforce(policy):
+    route = next(r for r in sample_app.routes if getattr(r, "path", "") == "/")
+    policy.enforce(route, {})
+
+    route = next(
+        r for r in sample_app.routes if getattr(r, "path", "") == "/analyst-dashboard"
+    )
+    policy.enforce(route, {"finances": 0, "it": 0})
+    assert policy.for_scope({"route": route}).name == "analyst_dashboard"
+    with pytest.raises(PermissionDeniedException, match="'it' not in user"):
+        policy.enforce(route, {"finances": 0})
+
+
+def test_for_scope_after_routing():
+    router = ProtectedRouter(prefix="/finances", rules=[areas.finances.READ])
+    seen = []
+
+    @router.get("/report")
+    def report(request: Request) -> dict[str, str]:
+        seen.append(policy.for_scope(request.scope))
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    policy = compile_policy(app)
+
+    client = TestClient(app)
+    client.get("/finances/report", headers={"Authorization": bearer_token()})
+    assert seen[0].path == "/finances/report"
+    assert seen[0].requirements == (("finances", 0),)
+
+
+def test_router_merges_weaker_rules():
+    router = ProtectedRouter(
+        prefix="/finances", rules=[areas.finances.READ, areas.finances.READ]
+    )
+    assert router.dependencies == [areas.finances.READ]
+
+    @router.get("/report")
+    def report() -> dict[str, str]:
+        return {}
+
+    @router.get("/close", dependencies=[areas.finances.ADMIN, areas.finances.READ])
+    def close() -> dict[str, str]:
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    policy = compile_policy(app)
+    assert policy.lookup("/finances/report").rules == (areas.finances.READ,)
+    assert policy.lookup("/finances/close").rules == (areas.finances.ADMIN,)
+
+
+def test_repeated_rule_runs_once_per_request():
+    metrics = InMemoryMetrics()
+    bearer = HeaderTokenBearer(
+        "Authorization", SECRET_KEY, "userPermissions", metrics=metrics
+    )
+    finances = Area("finances", bearer)
+    inner = ProtectedRouter(prefix="/inner", rules=[finances.READ])
+    outer = ProtectedRouter(prefix="/outer", rules=[Area("finances", bearer).READ])
+
+    @inner.get("/report")
+    def report() -> dict[str, str]:
+        return {}
+
+    outer.include_router(inner)
+    app = FastAPI()
+    app.include_router(outer)
+
+    response = TestClient(app).get(
+        "/outer/inner/report", headers={"Authorization": bearer_token()}
+    )
+    assert response.status_code == 200
+    assert metrics.counter("missil_access_decisions_total", area="finances") == 1
@@ -0,0 +1,147 @@
+import os
+import time
+import uuid
+
+import pytest
+
+from missil import HeaderTokenBearer
+from missil import MappedRevocationList
+from missil import MemoryRevocationList
+from missil import RevokedEntry
+from missil import TokenCache
+from missil import encode_jwt_token
+from missil.exceptions import TokenValidationException
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+LATER = time.time() + 3600
+
+
+def _token(**claims):
+    return encode_jwt_token({"permissions": {"finances": 1}, **claims}, SECRET_KEY, 1)
+
+
+def test_revoked_jti_is_rejected_even_when_cached():
+    revocations = MemoryRevocationList()
+    bearer = HeaderTokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        "permissions",
+        cache=TokenCache(),
+        revocations=revocations,
+    )
+    token = _token(jti="abc")
+    bearer.verify(token)
+    assert len(bearer.cache) == 1
+
+    revocations.revoke("abc", expires_at=LATER)
+    with pytest.raises(TokenValidationException, match="has been revoked"):
+        bearer.verify(token)
+    assert len(bearer.cache) == 0
+
+    with pytest.raises(TokenValidationException, match="has been revoked"):
+        bearer.verify(token)
+
+    bearer.verify(_token(jti="other"))
+
+
+def test_subject_revocation_spares_newer_tokens():
+    revocations = MemoryRevocationList(check_subjects=True)
+    now = int(time.time())
+    revocations.revoke_subject("john", expires_at=LATER, revoked_at=now)
+
+    assert revocations.is_revoked({"sub": "john", "iat": now - 10})
+    assert revocations.is_revoked({"sub": "john"})
+    assert not revocations.is_revoked({"sub": "john", "iat": now + 10})
+    assert not revocations.is_revoked({"sub": "jane", "iat": now - 10})
+    assert not MemoryRevocationList().is_revoked({"sub": "john"})
+
+
+def test_entries_expire_with_the_revoked_token():
+    revocations = MemoryRevocationList()
+    revocations.revoke("old", expires_at=time.time() - 1)
+    revocations.revoke("new", expires_at=LATER)
+
+    assert not revocations.is_revoked({"jti": "old"})
+    assert [entry.value for entry in revocations.entries()] == ["new"]
+    assert revocations.purge() == 1
+    assert len(revocations) == 1
+
+
+def test_revoking_purges_expired_entries(monkeypatch):
+    revocations = MemoryRevocationList(purge_interval=60)
+    revocations.revoke("old", expires_at=time.time() - 1)
+    revocations.revoke_subject("john", expires_at=time.time() - 1)
+    assert len(revocations) == 2
+
+    clock = time.monotonic() + 61
+    monkeypatch.setattr(time, "monotonic", lambda: clock)
+    revocations.revoke("new", expires_at=LATER)
+    assert [entry.value for entry in revocations.entries()] == ["new"]
+    assert len(revocations) == 1
+
+
+def test_mapped_list(tmp_path):
+    path = tmp_path / "revoked.bin"
+    jtis = [str(uuid.uuid4()) for _ in range(5000)]
+    written = MappedRevocationList.write(
+        path,
+        [RevokedEntry("jti", jti, LATER) for jti in jtis]
+        + [
+            RevokedEntry("jti", "expired", time.time() - 1),
+            RevokedEntry("sub", "john", LATER, revoked_at=time.time()),
+        ],
+    )
+    assert written == 5001
+
+    revocations = MappedRevocationList(path, check_subjects=True)
+    assert len(revocations) == 5001
+    assert all(revocations.is_revoked({"jti": jti}) for jti in jtis)
+    assert not revocations.is_revoked({"jti": "expired"})
+    assert revocations.is_revoked({"sub": "john", "iat": 0})
+    assert not revocations.is_revoked({"sub": "john", "iat": time.time() + 60})
+    assert (
+        sum(revocations.is_revoked({"jti": str(uuid.uuid4())}) for _ in range(1000))
+        == 0
+    )
+
+
+def test_mapped_list_reloads_replaced_file(tmp_path):
+    path = tmp_path / "revoked.bin"
+    revocations = MappedRevocationList(path, check_interval=0)
+    assert not revocations.is_revoked({"jti": "abc"})
+
+    source = MemoryRevocationList()
+    source.revoke("abc", expires_at=LATER)
+    source.save(path)
+    assert revocations.is_revoked({"jti": "abc"})
+
+    source.unrevoke("jti", "abc")
+    source.save(path)
+    assert not revocations.is_revoked({"jti": "abc"})
+    assert [p.name for p in tmp_path.iterdir()] == ["revoked.bin"]
+
+
+def test_mapped_list_ignores_corrupt_files(tmp_path):
+    path = tmp_path / "revoked.bin"
+    MappedRevocationList.write(path, [RevokedEntry("jti", "abc", LATER)])
+    revocations = MappedRevocationList(path, check_interval=0)
+
+    with open(str(path) + ".new", "wb") as f:
+        f.write(b"garbage")
+    os.replace(str(path) + ".new", path)
+
+    assert not revocations.reload()
+    assert revocations.is_revoked({"jti": "abc"})
+
+
+def test_is_revoked_can_be_overridden():
+    class DenyAll(HeaderTokenBearer):
+        """Bearer revoking every token."""
+
+        def is_revoked(self, decoded_token):  # noqa: D102
+            return True
+
+    bearer = DenyAll("Authorization", SECRET_KEY, "permissions")
+    with pytest.raises(TokenValidationException, match="has been revoked"):
+        bearer.verify(_token())
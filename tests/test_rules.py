@@ -1,13 +1,26 @@
+import inspect
+
+from fastapi import Depends
+from fastapi import FastAPI
 import pytest
+from starlette.testclient import TestClient
 
+from missil import READ
+from missil import WRITE
+from missil import HeaderTokenBearer
+from missil import encode_jwt_token
 from missil import make_area
 from missil import make_areas
+from missil import merge_rules
 from missil.rules import AccessRule
 from missil.rules import Area
 from missil.rules import AreasBase
 from missil.rules import Role
 
 
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
 class TestAreasBase:
     """Tests for AreasBase."""
 
@@ -52,6 +65,41 @@ class TestAreasBase:
         assert isinstance(areas.finances, Area)
         assert not hasattr(areas, "label")
 
+    def test_rules_built_once_on_access(self, bearer_token):
+        """Rules are built on first access and reused afterwards."""
+
+        class AppAreas(AreasBase):
+            finances: Area
+
+        area = AppAreas(bearer_token).finances
+        assert not hasattr(area, "__dict__")
+        assert not hasattr(area, "_read")
+
+        assert area.READ is area.READ
+        assert area.ADMIN is not area.READ
+        assert (area.READ.area, area.READ.level) == ("finances", READ)
+        assert not hasattr(area, "_write")
+
+    def test_type_hints_resolved_once_per_class(self, bearer_token, monkeypatch):
+        """Declared fields are resolved once and shared by every instance."""
+        import missil.rules
+
+        calls = []
+        get_type_hints = missil.rules.get_type_hints
+        monkeypatch.setattr(
+            missil.rules,
+            "get_type_hints",
+            lambda cls: calls.append(cls) or get_type_hints(cls),
+        )
+
+        class AppAreas(AreasBase):
+            finances: Area
+
+        AppAreas(bearer_token)
+        AppAreas(bearer_token)
+        assert AppAreas.area_names() == ["finances"]
+        assert calls == [AppAreas]
+
 
 def test_make_scope(bearer_token):
     with pytest.warns(DeprecationWarning):
@@ -97,3 +145,214 @@ def test_role_is_fastapi_depends(bearer_token):
     role = Role(area.READ)
     assert hasattr(role, "dependency")
     assert callable(role.dependency)
+
+
+def test_role_requires_rules():
+    with pytest.raises(ValueError):
+        Role()
+
+
+def test_role_resolves_bearer_once(bearer_token):
+    """Rules sharing a bearer are fused into a single bearer dependency."""
+    finances = Area("finances", bearer_token)
+    it = Area("it", bearer_token)
+    role = Role(finances.READ, it.READ, finances.WRITE)
+    params = inspect.signature(role.dependency).parameters
+    assert list(params) == ["_bearer_0"]
+    assert params["_bearer_0"].default.dependency is bearer_token
+
+
+def test_role_denial_message():
+    """A fused Role keeps the AccessRule error messages."""
+    bearer = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions")
+    finances = Area("finances", bearer)
+    it = Area("it", bearer)
+    role = Role(finances.READ, it.WRITE)
+
+    app = FastAPI()
+
+    @app.get("/role", dependencies=[role])
+    def endpoint() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    client = TestClient(app)
+
+    def call(permissions: dict[str, int]):
+        token = encode_jwt_token({"permissions": permissions}, SECRET_KEY, 1)
+        return client.get("/role", headers={"Authorization": token})
+
+    assert call({"finances": READ, "it": WRITE}).status_code == 200
+
+    response = call({"finances": READ})
+    assert response.status_code == 403
+    assert response.json() == {"detail": "'it' not in user permissions."}
+
+    response = call({"finances": READ, "it": READ})
+    assert response.status_code == 403
+    assert response.json() == {"detail": "insufficient access level: (0/1) on it."}
+
+
+class TestIndexedAreas:
+    """Tests for AreasBase subclasses declared with indexed=True."""
+
+    @pytest.fixture
+    def client(self):
+        """Call an app protected by indexed rules with the given permissions."""
+        bearer = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions")
+
+        class AppAreas(AreasBase, indexed=True):
+            finances: Area
+            it: Area
+
+        areas = AppAreas(bearer)
+        app = FastAPI()
+
+        @app.get("/rule", dependencies=[areas.finances.WRITE])
+        def rule_endpoint() -> dict[str, str]:
+            return {"msg": "ok"}
+
+        @app.get("/role", dependencies=[Role(areas.finances.READ, areas.it.WRITE)])
+        def role_endpoint() -> dict[str, str]:
+            return {"msg": "ok"}
+
+        client = TestClient(app)
+
+        def call(path: str, permissions: dict[str, int]):
+            token = encode_jwt_token({"permissions": permissions}, SECRET_KEY, 1)
+            return client.get(path, headers={"Authorization": token})
+
+        return call
+
+    def test_index_follows_declaration_order(self, bearer_token):
+        """Only Area fields are indexed, in declaration order, once per class."""
+
+        class AppAreas(AreasBase, indexed=True):
+            finances: Area
+            label: str
+            it: Area
+
+        assert AppAreas.area_index().areas == ("finances", "it")
+        assert AppAreas.area_index() is AppAreas.area_index()
+        assert AppAreas(bearer_token).finances.READ.area_index is not None
+
+    def test_rule(self, client):
+        """Indexed AccessRules keep the dict-based 403 messages."""
+        assert client("/rule", {"finances": WRITE}).status_code == 200
+
+        response = client("/rule", {"it": WRITE})
+        assert response.status_code == 403
+        assert response.json() == {"detail": "'finances' not in user permissions."}
+
+        response = client("/rule", {"finances": READ})
+        assert response.status_code == 403
+        assert response.json() == {
+            "detail": "insufficient access level: (0/1) on finances."
+        }
+
+    def test_role(self, client):
+        """Roles over indexed rules check compiled vectors."""
+        assert client("/role", {"finances": READ, "it": WRITE}).status_code == 200
+
+        response = client("/role", {"finances": READ, "it": READ})
+        assert response.status_code == 403
+        assert response.json() == {"detail": "insufficient access level: (0/1) on it."}
+
+
+class FinanceAreas(AreasBase):
+    """Areas nested under finances."""
+
+    payroll: Area
+    invoices: Area
+
+
+class TestHierarchicalAreas:
+    """Tests for nested AreasBase groups and wildcard grants."""
+
+    def test_nested_area_names(self, bearer_token):
+        """Nested groups prefix their areas with the field name."""
+
+        class AppAreas(AreasBase):
+            finances: FinanceAreas
+            it: Area
+
+        areas = AppAreas(bearer_token)
+        assert isinstance(areas.finances, FinanceAreas)
+        assert areas.finances.payroll.name == "finances.payroll"
+        assert areas.finances.payroll.WRITE.area == "finances.payroll"
+        assert AppAreas.area_names() == [
+            "finances.payroll",
+            "finances.invoices",
+            "it",
+        ]
+
+    @pytest.mark.parametrize("indexed", [False, True], ids=["dict", "indexed"])
+    def test_wildcard_grants(self, indexed):
+        """Wildcard grants in tokens cover nested areas."""
+        bearer = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions")
+
+        class AppAreas(AreasBase, indexed=indexed):
+            finances: FinanceAreas
+            it: Area
+
+        areas = AppAreas(bearer)
+        app = FastAPI()
+
+        @app.get("/payroll", dependencies=[areas.finances.payroll.WRITE])
+        def payroll() -> dict[str, str]:
+            return {"msg": "ok"}
+
+        @app.get(
+            "/role",
+            dependencies=[Role(areas.finances.invoices.WRITE, areas.it.READ)],
+        )
+        def role() -> dict[str, str]:
+            return {"msg": "ok"}
+
+        client = TestClient(app)
+
+        def call(path: str, permissions: dict[str, int]):
+            token = encode_jwt_token({"permissions": permissions}, SECRET_KEY, 1)
+            return client.get(path, headers={"Authorization": token})
+
+        assert call("/payroll", {"finances.*": WRITE}).status_code == 200
+        assert call("/payroll", {"*": WRITE}).status_code == 200
+        assert call("/role", {"finances.*": WRITE, "it": READ}).status_code == 200
+
+        response = call("/payroll", {"finances.*": WRITE, "finances.payroll": READ})
+        assert response.status_code == 403
+        assert response.json() == {
+            "detail": "insufficient access level: (0/1) on finances.payroll."
+        }
+
+        response = call("/role", {"finances.*": WRITE})
+        assert response.status_code == 403
+        assert response.json() == {"detail": "'it' not in user permissions."}
+
+
+class TestRuleMerging:
+    """Tests for interned rules and merge_rules."""
+
+    def test_interned_rules_are_shared(self, bearer_token):
+        """Areas with the same name and bearer share their rules."""
+        first = Area("finances", bearer_token)
+        second = Area("finances", bearer_token)
+        assert first.READ is second.READ
+        assert first.READ is AccessRule.interned("finances", READ, bearer_token)
+        assert first.WRITE is not second.READ
+
+        other = HeaderTokenBearer("Authorization", SECRET_KEY, "permissions")
+        assert Area("finances", other).READ is not first.READ
+
+    def test_merge_rules(self, bearer_token):
+        """Weaker and repeated rules are dropped, other dependencies kept."""
+        finances = Area("finances", bearer_token)
+        it = Area("it", bearer_token)
+        copy = AccessRule("finances", WRITE, bearer_token)
+        role = Role(it.WRITE)
+        other = Depends(lambda: None)
+
+        merged = merge_rules(
+            [finances.READ, other, it.READ, finances.WRITE, copy, role, it.WRITE]
+        )
+        assert merged == [other, finances.WRITE, role]
+        assert merged[1] is finances.WRITE
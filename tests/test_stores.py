@@ -0,0 +1,181 @@
+import asyncio
+
+from fastapi import FastAPI
+import pytest
+from starlette.testclient import TestClient
+
+from missil import READ
+from missil import WRITE
+from missil import Area
+from missil import MemoryPermissionStore
+from missil import PermissionResolver
+from missil import PermissionStore
+from missil import PermissionTrie
+from missil import SQLitePermissionStore
+from missil import TokenBearer
+from missil import TokenCache
+from missil import encode_jwt_token
+from missil.exceptions import TokenValidationException
+
+
+SECRET_KEY = "b522178515f3a13879e6ef63d40d18fbbffd4ff29673fcf442a6eca264a2ee16"
+
+
+class SlowStore(PermissionStore):
+    """Store answering after a delay, counting lookups."""
+
+    def __init__(self, permissions):  # noqa: D107
+        super().__init__()
+        self.permissions = permissions
+        self.calls = 0
+
+    async def load(self, subject):  # noqa: D102
+        self.calls += 1
+        permissions = self.permissions.get(subject, {})
+        await asyncio.sleep(0.01)
+        return permissions
+
+
+def test_permissions_come_from_the_store():
+    store = MemoryPermissionStore({"john": {"finances": READ}})
+    bearer = TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        permission_resolver=PermissionResolver(store),
+        cache=TokenCache(),
+    )
+    finances = Area("finances", bearer)
+    app = FastAPI()
+
+    @app.get("/write", dependencies=[finances.WRITE])
+    def write() -> dict[str, str]:
+        return {"msg": "ok"}
+
+    client = TestClient(app)
+    token = encode_jwt_token({"sub": "john"}, SECRET_KEY, 1)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/write", headers=headers).status_code == 403
+    store.set("john", {"finances": WRITE})
+    assert client.get("/write", headers=headers).status_code == 200
+    store.remove("john")
+    assert client.get("/write", headers=headers).json() == {
+        "detail": "'finances' not in user permissions."
+    }
+
+
+def test_subject_is_required():
+    bearer = TokenBearer(
+        "Authorization",
+        SECRET_KEY,
+        permission_resolver=PermissionResolver(MemoryPermissionStore()),
+    )
+    token = encode_jwt_token({"name": "john"}, SECRET_KEY, 1)
+
+    with pytest.raises(TokenValidationException) as missing:
+        asyncio.run(bearer.authenticate(token))
+    assert missing.value.status_code == 401
+    with pytest.raises(TypeError, match="asynchronously"):
+        bearer.verify(token)
+
+
+def test_concurrent_lookups_are_coalesced():
+    store = SlowStore({"john": {"finances": READ}})
+    resolver = PermissionResolver(store)
+
+    async def burst():
+        return await asyncio.gather(*(resolver.get("john") for _ in range(20)))
+
+    results = asyncio.run(burst())
+    assert results == [{"finances": READ}] * 20
+    assert store.calls == 1
+
+    asyncio.run(resolver.get("john"))
+    assert store.calls == 1
+
+    resolver.invalidate("john")
+    asyncio.run(resolver.get("john"))
+    assert store.calls == 2
+
+
+def test_ttl_and_size():
+    store = SlowStore({})
+    resolver = PermissionResolver(store, ttl=0, maxsize=2)
+
+    for subject in ("a", "b", "c", "a"):
+        asyncio.run(resolver.get(subject))
+
+    assert store.calls == 4
+    assert len(resolver) == 2
+
+
+def test_invalidation_during_lookup_is_not_cached():
+    store = SlowStore({"john": {"finances": READ}})
+    resolver = PermissionResolver(store)
+
+    async def invalidated_lookup():
+        lookup = asyncio.ensure_future(resolver.get("john"))
+        await asyncio.sleep(0.005)  # the store is now answering
+        store.permissions["john"] = {"finances": WRITE}
+        resolver.invalidate()
+        return await lookup, await resolver.get("john")
+
+    assert asyncio.run(invalidated_lookup()) == (
+        {"finances": READ},
+        {"finances": WRITE},
+    )
+    assert store.calls == 2
+
+
+def test_invalidation_is_per_subject():
+    store = SlowStore({"john": {"finances": READ}, "jane": {"it": READ}})
+    resolver = PermissionResolver(store)
+
+    async def lookups():
+        await resolver.get("jane")
+        lookup = asyncio.ensure_future(resolver.get("john"))
+        await asyncio.sleep(0.005)  # the store is now answering
+        resolver.invalidate("jane")
+        await lookup
+
+    asyncio.run(lookups())
+    assert store.calls == 2
+    assert len(resolver) == 1
+
+    asyncio.run(resolver.get("john"))
+    assert store.calls == 2
+
+    async def invalidated_lookup():
+        lookup = asyncio.ensure_future(resolver.get("jane"))
+        await asyncio.sleep(0.005)
+        store.permissions["jane"] = {"it": WRITE}
+        resolver.invalidate("jane")
+        return await lookup, await resolver.get("jane")
+
+    assert asyncio.run(invalidated_lookup()) == ({"it": READ}, {"it": WRITE})
+    assert store.calls == 4
+    asyncio.run(resolver.get("john"))
+    assert store.calls == 4
+
+
+def test_sqlite_store(tmp_path):
+    store = SQLitePermissionStore(tmp_path / "permissions.db")
+    store.set("john", {"finances.*": WRITE, "it": READ})
+    store.set("john", {"finances.*": READ})
+    store.set("jane", {"it": WRITE})
+    resolver = PermissionResolver(store)
+
+    permissions = asyncio.run(resolver.get("john"))
+    assert isinstance(permissions, PermissionTrie)
+    assert permissions == {"finances.*": READ}
+    assert permissions["finances.payroll"] == READ
+    assert asyncio.run(resolver.get("nobody")) == {}
+
+    store.remove("john")
+    assert asyncio.run(resolver.get("john")) == {}
+    store.close()
+
+    reopened = SQLitePermissionStore(tmp_path / "permissions.db")
+    assert reopened.load_sync("jane") == {"it": WRITE}
+    with pytest.raises(ValueError, match="table name"):
+        SQLitePermissionStore(":memory:", table="x; DROP TABLE y")